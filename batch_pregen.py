@@ -0,0 +1,211 @@
+import io
+import sys
+import json
+import time
+import argparse
+
+import calc_generator
+from curriculum import iter_bank_keys
+from distractors import local_questions
+from json_stream import parse_array
+from prompts import build_prompt, chat_body
+from question_bank import bank_key, open_store
+from selection import is_valid
+from verify import verify_questions
+
+# 문제 은행을 OpenAI Batch API 로 미리 채우는 오프라인 작업.
+# 교육과정 전체 (주제 × 유형 × 계산/문장제) 에 대한 chat completion 요청을 JSONL 로 만들어
+# 배치로 제출하고, 끝나면 결과 파일을 한 줄씩 읽어 검증한 뒤 은행에 넣는다.
+# 로컬 생성기가 있는 계산 문항은 배치 없이 바로 채운다.
+#
+#   python batch_pregen.py --store dynamodb:<table> --per-key 60
+
+ENDPOINT      = "/v1/chat/completions"
+FINAL_STATES  = ('completed', 'failed', 'expired', 'cancelled')
+PER_REQUEST   = 10   # 요청 하나에 담을 문항 수
+FLUSH_AT      = 500  # 결과를 이만큼 모아 한 번에 저장한다 (DynamoDB 는 동시 BatchWriteItem)
+
+def build_requests(per_key):
+    requests = []
+    for parts in iter_bank_keys():
+        _, _, topic, qtype, kind = parts
+        if kind == 'calc' and calc_generator.supports(topic):
+            continue
+        for i in range(0, per_key, PER_REQUEST):
+            n      = min(PER_REQUEST, per_key - i)
+            prompt = build_prompt(n, qtype, topic, word_count=n if kind == 'word' else 0)
+            requests.append({
+                "custom_id": f"{bank_key(*parts)}#{i // PER_REQUEST}",
+                "method"   : "POST",
+                "url"      : ENDPOINT,
+                "body"     : chat_body(prompt),
+            })
+    return requests
+
+def fill_local(store, per_key):
+    entries = []
+    for parts in iter_bank_keys():
+        _, _, topic, qtype, kind = parts
+        if kind == 'calc' and calc_generator.supports(topic):
+            entries.append((bank_key(*parts), local_questions(topic, qtype, per_key)))
+    return store.add_many(entries)
+
+def to_jsonl(requests):
+    return ''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in requests).encode()
+
+def submit(client, requests):
+    upload = client.files.create(file=('pregen.jsonl', io.BytesIO(to_jsonl(requests))), purpose='batch')
+    return client.batches.create(input_file_id=upload.id, endpoint=ENDPOINT, completion_window='24h')
+
+def wait(client, batch_id, interval=60):
+    while True:
+        batch = client.batches.retrieve(batch_id)
+        if batch.status in FINAL_STATES:
+            return batch
+        print(f"Batch {batch_id}: {batch.status} {batch.request_counts}")
+        time.sleep(interval)
+
+def parse_result_line(line):
+    # 결과 한 줄 -> (bank_key, [question, ...]); 실패한 줄은 (key, [])
+    record = json.loads(line)
+    key    = record['custom_id'].rsplit('#', 1)[0]
+    res    = record.get('response') or {}
+    if record.get('error') or res.get('status_code') != 200:
+        return key, []
+    raw = res['body']['choices'][0]['message']['content']
+    try:
+        items, _ = parse_array(raw)
+    except ValueError:
+        return key, []
+    questions = verify_questions([q for q in items if is_valid(q)])
+    for q in questions:
+        q.pop('number', None)
+    return key, questions
+
+def ingest(client, batch, store):
+    # 결과 파일은 통째로 받지 않고 줄 단위로 읽어, FLUSH_AT 문항씩 모아 저장한다
+    stats   = {'lines': 0, 'failed': 0, 'questions': 0, 'write_seconds': 0.0, 'throttles': 0}
+    pending = []
+
+    def flush():
+        written = store.add_many(pending)
+        if written:
+            stats['write_seconds'] += written['seconds']
+            stats['throttles']     += written['throttles'] + written['unprocessed_retries']
+        pending.clear()
+
+    with client.files.with_streaming_response.content(batch.output_file_id) as res:
+        for line in res.iter_lines():
+            if not line.strip():
+                continue
+            stats['lines'] += 1
+            try:
+                key, questions = parse_result_line(line)
+            except (ValueError, KeyError, IndexError, TypeError):
+                stats['failed'] += 1
+                continue
+            if not questions:
+                stats['failed'] += 1
+                continue
+            pending.append((key, questions))
+            stats['questions'] += len(questions)
+            if sum(len(qs) for _, qs in pending) >= FLUSH_AT:
+                flush()
+    flush()
+    stats['write_seconds'] = round(stats['write_seconds'], 3)
+    return stats
+
+def run(client, store, per_key, interval=60):
+    fill_local(store, per_key)
+    batch = submit(client, build_requests(per_key))
+    print(f"Submitted batch {batch.id}")
+    batch = wait(client, batch.id, interval)
+    if batch.status != 'completed':
+        raise Exception(f"Batch {batch.id} ended with status {batch.status}")
+    return ingest(client, batch, store)
+
+
+class _Obj(dict):
+    __getattr__ = dict.__getitem__
+
+
+class LocalBatchClient:
+    # 테스트용 가짜 배치 엔드포인트: 제출 즉시 respond(body) -> content 로 결과를 만든다
+    def __init__(self, respond):
+        self.respond = respond
+        self._files  = {}
+        self._seq    = 0
+        self.files   = self._Files(self)
+        self.batches = self._Batches(self)
+
+    def _new_id(self, prefix):
+        self._seq += 1
+        return f"{prefix}-{self._seq}"
+
+    class _Files:
+        def __init__(self, client):
+            self._c = client
+            self.with_streaming_response = self
+
+        def create(self, file, purpose):
+            data = file[1].read() if isinstance(file, tuple) else file.read()
+            fid  = self._c._new_id('file')
+            self._c._files[fid] = data
+            return _Obj(id=fid)
+
+        def content(self, file_id):
+            return LocalBatchClient._Stream(self._c._files[file_id])
+
+    class _Stream:
+        def __init__(self, data):
+            self._data = data
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def iter_lines(self):
+            yield from self._data.decode().splitlines()
+
+    class _Batches:
+        def __init__(self, client):
+            self._c     = client
+            self._store = {}
+
+        def create(self, input_file_id, endpoint, completion_window):
+            out = []
+            for line in self._c._files[input_file_id].decode().splitlines():
+                req     = json.loads(line)
+                content = self._c.respond(req['body'])
+                out.append(json.dumps({
+                    "custom_id": req['custom_id'],
+                    "response" : {"status_code": 200, "body": {
+                        "choices": [{"message": {"role": "assistant", "content": content}}]}},
+                    "error"    : None,
+                }, ensure_ascii=False))
+            out_id = self._c._new_id('file')
+            self._c._files[out_id] = ('\n'.join(out) + '\n').encode()
+            batch = _Obj(id=self._c._new_id('batch'), status='completed', output_file_id=out_id,
+                         request_counts={'total': len(out), 'completed': len(out), 'failed': 0})
+            self._store[batch.id] = batch
+            return batch
+
+        def retrieve(self, batch_id):
+            return self._store[batch_id]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-generate the question bank with the OpenAI Batch API")
+    parser.add_argument('--store', required=True, help="memory | sqlite:<path> | dynamodb:<table>")
+    parser.add_argument('--per-key', type=int, default=60)
+    parser.add_argument('--poll-interval', type=int, default=60)
+    args = parser.parse_args(argv)
+
+    import openai
+    stats = run(openai.OpenAI(), open_store(args.store), args.per_key, args.poll_interval)
+    print(json.dumps(stats))
+
+if __name__ == '__main__':
+    sys.exit(main())
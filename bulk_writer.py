@@ -0,0 +1,102 @@
+import time
+import random
+import threading
+
+# 대량 적재용 DynamoDB 쓰기 도구 (문제 은행 보충, 배치 결과 적재, 백필 등).
+# 항목을 25개씩 BatchWriteItem 요청으로 나눠 제한된 스레드 풀에서 동시에 보내고,
+# UnprocessedItems 와 스로틀 오류는 지터를 섞은 지수 백오프로 다시 보낸다.
+# 끝나면 처리량과 스로틀 횟수를 돌려준다.
+
+BATCH_LIMIT     = 25
+THROTTLE_ERRORS = ('ProvisionedThroughputExceededException', 'ThrottlingException',
+                   'RequestLimitExceeded', 'InternalServerError')
+
+_client = None
+
+def dynamodb_client():
+    # 저수준 DynamoDB 클라이언트: 처음 쓸 때 만들어 컨테이너 안에서 재사용한다 (스레드 안전).
+    # boto3 는 여기서 처음 import 되므로 핸들러 import 시간에 들어가지 않는다.
+    global _client
+    if _client is None:
+        import boto3
+        _client = boto3.client('dynamodb')
+    return _client
+
+def to_attributes(item):
+    from boto3.dynamodb.types import TypeSerializer
+    ser = TypeSerializer()
+    return {k: ser.serialize(v) for k, v in item.items()}
+
+def from_attributes(item):
+    from boto3.dynamodb.types import TypeDeserializer
+    de = TypeDeserializer()
+    return {k: de.deserialize(v) for k, v in item.items()}
+
+class BulkWriter:
+    def __init__(self, table_name, key_names=None, client=None, max_workers=8,
+                 max_attempts=10, base_delay=0.05, max_delay=5.0):
+        self.table_name   = table_name
+        self.key_names    = key_names     # 같은 요청 안의 중복 키 제거용 (예: ['bank_key', 'entry_id'])
+        self.max_workers  = max_workers
+        self.max_attempts = max_attempts
+        self.base_delay   = base_delay
+        self.max_delay    = max_delay
+        self._client      = client
+        self._lock        = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = dynamodb_client()
+        return self._client
+
+    def _backoff(self, attempt):
+        # full jitter
+        time.sleep(random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt)))
+
+    def _chunks(self, items):
+        if self.key_names:
+            # 같은 키는 마지막 항목만 남긴다 (BatchWriteItem 은 중복 키를 거부한다)
+            items = list({tuple(it[k] for k in self.key_names): it for it in items}.values())
+        reqs = [{'PutRequest': {'Item': to_attributes(it)}} for it in items]
+        return [reqs[i:i + BATCH_LIMIT] for i in range(0, len(reqs), BATCH_LIMIT)]
+
+    def _send(self, reqs, stats):
+        from botocore.exceptions import ClientError
+        pending = reqs
+        for attempt in range(self.max_attempts):
+            try:
+                res = self.client.batch_write_item(RequestItems={self.table_name: pending})
+            except ClientError as e:
+                if e.response['Error']['Code'] not in THROTTLE_ERRORS:
+                    raise
+                with self._lock:
+                    stats['throttles'] += 1
+                self._backoff(attempt)
+                continue
+
+            with self._lock:
+                stats['requests'] += 1
+            pending = res.get('UnprocessedItems', {}).get(self.table_name, [])
+            if not pending:
+                return 0
+            with self._lock:
+                stats['unprocessed_retries'] += 1
+            self._backoff(attempt)
+        return len(pending)
+
+    def write(self, items):
+        stats = {'items': len(items), 'requests': 0, 'throttles': 0,
+                 'unprocessed_retries': 0, 'failed': 0}
+        start  = time.monotonic()
+        chunks = self._chunks(items)
+        if len(chunks) == 1:
+            stats['failed'] = self._send(chunks[0], stats)
+        elif chunks:
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(chunks))) as pool:
+                for failed in pool.map(lambda c: self._send(c, stats), chunks):
+                    stats['failed'] += failed
+        stats['seconds']          = round(time.monotonic() - start, 3)
+        stats['items_per_second'] = round(len(items) / stats['seconds'], 1) if stats['seconds'] else None
+        return stats
@@ -0,0 +1,248 @@
+import random
+
+# 교육과정(index.html 의 topicsMap) 단원별 계산 문항을 규칙으로 직접 만든다.
+# LLM 없이 정확한 문제·정답·조언을 즉시 만들며, 받아올림/받아내림 횟수 등으로
+# 난이도를 조절할 수 있다. 도형 단원처럼 계산 문항이 아닌 주제는 지원하지 않는다.
+#
+# 각 문항의 '_calc' 에는 연산 종류와 피연산자, 정답 값을 담아 두어
+# 오답 선지 생성이나 검증 단계에서 다시 쓸 수 있게 한다.
+
+def _digits_with_carries(rng, carries, positions=3):
+    # 자리마다 (a, b) 를 골라 받아올림이 정확히 carries 자리에서만 생기게 한다
+    carry_at = set(rng.sample(range(positions), carries))
+    a = b = 0
+    c = 0
+    for p in range(positions):
+        lo = 1 if p == positions - 1 else 0
+        while True:
+            da = rng.randint(lo, 9)
+            if p in carry_at:
+                blo, bhi = max(lo, 10 - da - c), 9
+            else:
+                blo, bhi = lo, 9 - da - c
+            if blo <= bhi:
+                db = rng.randint(blo, bhi)
+                break
+        a += da * 10 ** p
+        b += db * 10 ** p
+        c  = 1 if p in carry_at else 0
+    return a, b
+
+def _digits_with_borrows(rng, borrows):
+    # 일·십의 자리 중 borrows 자리에서만 받아내림이 생기는 세 자리 뺄셈
+    borrow_at = set(rng.sample(range(2), borrows))
+    a = b = 0
+    c = 0
+    for p in range(2):
+        while True:
+            da = rng.randint(0, 9)
+            if p in borrow_at:
+                blo, bhi = da - c + 1, 9
+            else:
+                blo, bhi = 0, da - c
+            if 0 <= blo <= bhi:
+                db = rng.randint(blo, bhi)
+                break
+        a += da * 10 ** p
+        b += db * 10 ** p
+        c  = 1 if p in borrow_at else 0
+    da = rng.randint(2 + c, 9)
+    db = rng.randint(1, da - c - 1)
+    return a + da * 100, b + db * 100
+
+def _count_carries(a, b):
+    # (몇십몇) × (몇) 의 곱셈에서 올림이 생기는 자리 수
+    carries, c = 0, 0
+    while a:
+        d = (a % 10) * b + c
+        c = d // 10
+        a //= 10
+        if c:
+            carries += 1
+    return carries
+
+def gen_add(rng, carries=None, **_):
+    if carries is None:
+        carries = rng.randint(0, 2)
+    a, b = _digits_with_carries(rng, min(carries, 3))
+    advice = ("일의 자리부터 더하고, 합이 10 이상이면 윗자리로 받아올림하세요."
+              if carries else "같은 자리 숫자끼리 차례로 더하세요.")
+    return {
+        'stem'  : f"{a} + {b}를 구하세요." if rng.random() < 0.5 else f"{a} + {b} = ?",
+        'answer': str(a + b),
+        'advice': advice,
+        '_calc' : {'op': 'add', 'operands': [a, b], 'value': a + b},
+    }
+
+def gen_sub(rng, borrows=None, **_):
+    if borrows is None:
+        borrows = rng.randint(0, 2)
+    a, b = _digits_with_borrows(rng, min(borrows, 2))
+    advice = ("빼지는 수의 자리 숫자가 작으면 윗자리에서 10을 받아내림하세요."
+              if borrows else "같은 자리 숫자끼리 차례로 빼세요.")
+    return {
+        'stem'  : f"{a} - {b}를 구하세요." if rng.random() < 0.5 else f"{a} - {b} = ?",
+        'answer': str(a - b),
+        'advice': advice,
+        '_calc' : {'op': 'sub', 'operands': [a, b], 'value': a - b},
+    }
+
+def gen_mul_tens(rng, carries=None, **_):
+    while True:
+        t, b = rng.randint(1, 9), rng.randint(2, 9)
+        if carries is None or (t * b >= 10) == bool(carries):
+            break
+    a = t * 10
+    return {
+        'stem'  : f"{a} × {b} = ?",
+        'answer': str(a * b),
+        'advice': f"{t} × {b}를 먼저 계산한 뒤 0을 하나 붙이세요.",
+        '_calc' : {'op': 'mul', 'operands': [a, b], 'value': a * b},
+    }
+
+def gen_mul_two_digit(rng, carries=None, **_):
+    while True:
+        a, b = rng.randint(11, 99), rng.randint(2, 9)
+        if a % 10 == 0:
+            continue
+        if carries is None or _count_carries(a, b) == min(carries, 2):
+            break
+    return {
+        'stem'  : f"{a} × {b} = ?",
+        'answer': str(a * b),
+        'advice': "일의 자리 곱과 십의 자리 곱을 따로 구해 더하고, 올림한 수를 잊지 마세요.",
+        '_calc' : {'op': 'mul', 'operands': [a, b], 'value': a * b},
+    }
+
+def gen_div(rng, remainder=None, **_):
+    if remainder is None:
+        remainder = rng.random() < 0.5
+    while True:
+        b = rng.randint(2, 9)
+        q = rng.randint(2, 99 // b)
+        r = rng.randint(1, b - 1) if remainder else 0
+        a = b * q + r
+        if 10 <= a <= 99:
+            break
+    if r:
+        return {
+            'stem'  : f"{a} ÷ {b}의 몫과 나머지를 구하세요.",
+            'answer': f"몫 {q}, 나머지 {r}",
+            'advice': f"{b}단 곱셈구구에서 {a}보다 크지 않은 가장 큰 수를 찾으세요.",
+            '_calc' : {'op': 'div', 'operands': [a, b], 'value': [q, r]},
+        }
+    return {
+        'stem'  : f"{a} ÷ {b} = ?",
+        'answer': str(q),
+        'advice': f"{b}에 어떤 수를 곱하면 {a}가 되는지 곱셈구구로 생각하세요.",
+        '_calc' : {'op': 'div', 'operands': [a, b], 'value': [q, 0]},
+    }
+
+def format_time(minutes):
+    h, m = divmod(minutes, 60)
+    if not h:
+        return f"{m}분"
+    return f"{h}시간 {m}분" if m else f"{h}시간"
+
+def gen_time_add(rng, carries=None, **_):
+    if carries is None:
+        carries = rng.randint(0, 1)
+    while True:
+        h1, h2 = rng.randint(1, 5), rng.randint(1, 4)
+        m1, m2 = rng.randint(5, 55), rng.randint(5, 55)
+        if (m1 + m2 >= 60) == bool(carries):
+            break
+    a, b = h1 * 60 + m1, h2 * 60 + m2
+    return {
+        'stem'  : f"{format_time(a)} + {format_time(b)} = ?",
+        'answer': format_time(a + b),
+        'advice': ("분끼리 더한 값이 60분 이상이면 60분을 1시간으로 받아올림하세요."
+                   if carries else "시간은 시간끼리, 분은 분끼리 더하세요."),
+        '_calc' : {'op': 'time_add', 'operands': [a, b], 'value': a + b},
+    }
+
+def gen_time_sub(rng, borrows=None, **_):
+    if borrows is None:
+        borrows = rng.randint(0, 1)
+    while True:
+        h1, h2 = rng.randint(2, 6), rng.randint(1, 4)
+        m1, m2 = rng.randint(5, 55), rng.randint(5, 55)
+        if h1 - (1 if m1 < m2 else 0) <= h2:
+            continue
+        if (m1 < m2) == bool(borrows):
+            break
+    a, b = h1 * 60 + m1, h2 * 60 + m2
+    return {
+        'stem'  : f"{format_time(a)} - {format_time(b)} = ?",
+        'answer': format_time(a - b),
+        'advice': ("분끼리 뺄 수 없으면 1시간을 60분으로 받아내림하세요."
+                   if borrows else "시간은 시간끼리, 분은 분끼리 빼세요."),
+        '_calc' : {'op': 'time_sub', 'operands': [a, b], 'value': a - b},
+    }
+
+_COMPARE_STEM = "○ 안에 >, =, < 중 알맞은 것을 써넣으세요. {} ○ {}"
+
+def _compare_sign(x, y):
+    return '>' if x > y else '<' if x < y else '='
+
+def gen_fraction_compare(rng, unit=None, **_):
+    # 분모가 같은 분수 또는 단위분수끼리 비교
+    if unit is None:
+        unit = rng.random() < 0.4
+    if unit:
+        d1, d2 = rng.sample(range(2, 13), 2)
+        a, b = (1, d1), (1, d2)
+        advice = "단위분수는 분모가 작을수록 더 큰 수입니다."
+    else:
+        d = rng.randint(3, 12)
+        n1, n2 = rng.sample(range(1, d), 2)
+        a, b = (n1, d), (n2, d)
+        advice = "분모가 같으면 분자가 큰 분수가 더 큽니다."
+    sign = _compare_sign(a[0] * b[1], b[0] * a[1])
+    return {
+        'stem'  : _COMPARE_STEM.format(f"{a[0]}/{a[1]}", f"{b[0]}/{b[1]}"),
+        'answer': sign,
+        'advice': advice,
+        '_calc' : {'op': 'compare', 'operands': [f"{a[0]}/{a[1]}", f"{b[0]}/{b[1]}"], 'value': sign},
+    }
+
+def gen_decimal_compare(rng, **_):
+    a, b = rng.sample(range(1, 100), 2)
+    x, y = f"{a // 10}.{a % 10}", f"{b // 10}.{b % 10}"
+    return {
+        'stem'  : _COMPARE_STEM.format(x, y),
+        'answer': _compare_sign(a, b),
+        'advice': "자연수 부분을 먼저 비교하고, 같으면 소수 첫째 자리를 비교하세요.",
+        '_calc' : {'op': 'compare', 'operands': [x, y], 'value': _compare_sign(a, b)},
+    }
+
+TOPIC_GENERATORS = {
+    '세 자리 수의 덧셈'     : gen_add,
+    '세 자리 수의 뺄셈'     : gen_sub,
+    '두 자릿 수 ÷ 한 자릿 수': gen_div,
+    '(몇 십) × (몇)'       : gen_mul_tens,
+    '(몇십몇) × (몇)'      : gen_mul_two_digit,
+    '시간의 덧셈'           : gen_time_add,
+    '시간의 뺄셈'           : gen_time_sub,
+    '분수 비교'             : gen_fraction_compare,
+    '소수 비교'             : gen_decimal_compare,
+}
+
+def supports(topic):
+    return topic in TOPIC_GENERATORS
+
+def generate(topic, count, seed=None, **difficulty):
+    # difficulty: carries / borrows / remainder / unit 등 주제별 난이도 옵션
+    gen  = TOPIC_GENERATORS[topic]
+    rng  = random.Random(seed)
+    seen = set()
+    out  = []
+    for _ in range(count * 20):
+        if len(out) == count:
+            break
+        q = gen(rng, **difficulty)
+        if q['stem'] in seen:
+            continue
+        seen.add(q['stem'])
+        out.append(q)
+    return out
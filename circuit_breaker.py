@@ -0,0 +1,92 @@
+import time
+import threading
+from collections import deque
+
+# 컨테이너 단위 서킷 브레이커.
+# 최근 window 초 동안의 호출 결과(실패·느린 호출)를 세어 비율이 임계를 넘으면 열린다(open).
+# 열려 있는 동안은 호출하지 않고 CircuitOpen 을 바로 올리므로, 호출한 쪽은 로컬 생성기나
+# 문제 은행으로 대신 응답한다. open_seconds 가 지나면 반쯤 열림(half_open) 상태에서
+# 시험 호출을 probes 개만 통과시키고, 성공하면 닫히고(closed) 실패하면 다시 열린다.
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+class CircuitOpen(Exception):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(self, window=60, min_calls=5, failure_rate=0.5, slow_seconds=20,
+                 open_seconds=30, probes=1, ignore=()):
+        self.window       = window
+        self.min_calls    = min_calls
+        self.failure_rate = failure_rate   # 실패 + 느린 호출 비율
+        self.slow_seconds = slow_seconds
+        self.open_seconds = open_seconds
+        self.probes       = probes
+        self.ignore       = tuple(ignore)  # 실패로 세지 않는 예외 (예: 호출 전에 돌려보낸 요청)
+        self.state        = CLOSED
+        self._calls       = deque()        # (시각, 나쁜 호출 여부)
+        self._opened_at   = 0.0
+        self._in_probe    = 0
+        self._lock        = threading.Lock()
+
+    def _trim(self, now):
+        while self._calls and self._calls[0][0] < now - self.window:
+            self._calls.popleft()
+
+    def _open(self, now):
+        self.state      = OPEN
+        self._opened_at = now
+        self._in_probe  = 0
+        print("Circuit breaker opened")
+
+    def allow(self):
+        now = time.monotonic()
+        with self._lock:
+            if self.state == OPEN and now - self._opened_at >= self.open_seconds:
+                self.state = HALF_OPEN
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and self._in_probe < self.probes:
+                self._in_probe += 1
+                return True
+            return False
+
+    def record(self, ok, seconds):
+        now = time.monotonic()
+        bad = not ok or seconds > self.slow_seconds
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._in_probe = max(0, self._in_probe - 1)
+                if bad:
+                    self._open(now)
+                else:
+                    self.state = CLOSED
+                    self._calls.clear()
+                    print("Circuit breaker closed")
+                return
+            if self.state == OPEN:
+                return   # 열리기 전에 시작한 호출의 결과
+
+            self._calls.append((now, bad))
+            self._trim(now)
+            failures = sum(b for _, b in self._calls)
+            if len(self._calls) >= self.min_calls and failures / len(self._calls) >= self.failure_rate:
+                self._open(now)
+
+    def call(self, fn):
+        if not self.allow():
+            raise CircuitOpen("OpenAI circuit is open")
+        start = time.monotonic()
+        try:
+            result = fn()
+        except self.ignore:
+            with self._lock:
+                if self.state == HALF_OPEN:
+                    self._in_probe = max(0, self._in_probe - 1)
+            raise
+        except Exception:
+            self.record(False, time.monotonic() - start)
+            raise
+        self.record(True, time.monotonic() - start)
+        return result
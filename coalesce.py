@@ -0,0 +1,209 @@
+import json
+import math
+import time
+import uuid
+import threading
+
+from bulk_writer import dynamodb_client, from_attributes, to_attributes
+
+# 같은 설정의 학습지 요청이 동시에 몰릴 때 생성을 한 번만 하도록 묶는다.
+#   - 컨테이너 안: 같은 키로 진행 중인 생성이 있으면 그 결과를 기다린다 (single-flight)
+#   - 컨테이너 사이: DynamoDB 에 짧은 임대(lease) 항목을 조건부로 써서 리더 하나만 생성하고,
+#     나머지는 리더가 결과를 써 넣을 때까지 기다렸다가 그대로 읽어 간다.
+#
+# 임대 테이블: 파티션 키 lease_key (S), TTL 속성 ttl
+#
+# replay=True 로 result_seconds 를 길게 잡으면 같은 키의 재시도에 첫 결과를 그대로 돌려주는
+# 멱등 키(Idempotency-Key) 저장소로도 쓴다. 테이블이 없으면 ResultCache 가 컨테이너 안에서 대신한다.
+#
+# 팔로워는 호출한 쪽이 준 시간(요청의 남은 시간 중 일부)만 기다린다. 그 안에 결과가 없으면
+# 직접 생성하지 않고 StillRunning 을 올린다 — 핸들러가 503 + Retry-After 로 돌려준다.
+# (기다린 뒤에 생성까지 하면 API Gateway 의 29초 제한을 넘긴다.)
+
+MAX_RETRY_AFTER = 10   # Retry-After 상한(초): 리더의 임대가 길어도 이보다 늦게 다시 오게 하지 않는다
+
+def coalesce_key(*parts):
+    return '|'.join(str(p).strip() for p in parts)
+
+def _copy(result):
+    return json.loads(json.dumps(result))
+
+
+class StillRunning(Exception):
+    def __init__(self, seconds=MAX_RETRY_AFTER):
+        # seconds: 리더가 끝날 때까지 남았을 것으로 보는 시간
+        self.retry_after = min(MAX_RETRY_AFTER, max(1, math.ceil(seconds)))
+        super().__init__(f"Same request is still being generated, retry after {self.retry_after}s")
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls = {}
+        self._lock  = threading.Lock()
+
+    def do(self, key, fn, timeout=None):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = {'done': threading.Event()}
+                leader = True
+            else:
+                leader = False
+
+        if not leader:
+            if not call['done'].wait(timeout):
+                raise StillRunning()
+            if 'error' in call:
+                raise call['error']
+            return _copy(call['result'])
+
+        try:
+            call['result'] = fn()
+            return call['result']
+        except Exception as e:
+            call['error'] = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call['done'].set()
+
+
+class DynamoLease:
+    def __init__(self, table_name, lease_seconds=30, result_seconds=5, poll_interval=0.25, replay=False):
+        self.table_name     = table_name
+        self.lease_seconds  = lease_seconds    # 리더가 결과를 내야 하는 시간
+        self.result_seconds = result_seconds   # 결과를 남겨 두는 시간
+        self.poll_interval  = poll_interval
+        # False: 생성 중에 도착한 팔로워만 결과를 나눠 받고, 끝난 뒤에 온 요청은 새로 만든다
+        #        (같은 설정으로 다시 눌러도 새 학습지가 나오도록).
+        # True : 끝난 결과도 result_seconds 동안 그대로 돌려준다 (멱등 키 재시도용).
+        self.replay         = replay
+
+    def _key(self, key):
+        return {'lease_key': {'S': key}}
+
+    def _acquire(self, key, owner):
+        from botocore.exceptions import ClientError
+        now    = int(time.time())
+        kwargs = {
+            'ConditionExpression'      : 'attribute_not_exists(lease_key) OR expires_at < :now',
+            'ExpressionAttributeValues': {':now': {'N': str(now)}},
+        }
+        if not self.replay:
+            # 끝난 결과는 새 요청이 바로 리더를 이어받는다
+            kwargs['ConditionExpression'] += ' OR #s = :done'
+            kwargs['ExpressionAttributeNames'] = {'#s': 'status'}
+            kwargs['ExpressionAttributeValues'][':done'] = {'S': 'done'}
+        try:
+            dynamodb_client().put_item(
+                TableName=self.table_name,
+                Item=to_attributes({
+                    'lease_key' : key,
+                    'owner'     : owner,
+                    'status'    : 'running',
+                    'expires_at': now + self.lease_seconds,
+                    'ttl'       : now + self.lease_seconds + self.result_seconds,
+                }),
+                **kwargs,
+            )
+            return True
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                return False
+            raise
+
+    def _publish(self, key, owner, result):
+        now = int(time.time())
+        dynamodb_client().update_item(
+            TableName=self.table_name,
+            Key=self._key(key),
+            UpdateExpression='SET #s = :done, #r = :result, expires_at = :exp, #t = :exp',
+            ConditionExpression='#o = :owner',
+            ExpressionAttributeNames={'#s': 'status', '#r': 'result', '#o': 'owner', '#t': 'ttl'},
+            ExpressionAttributeValues=to_attributes({
+                ':done'  : 'done',
+                ':result': json.dumps(result, ensure_ascii=False),
+                ':exp'   : now + self.result_seconds,
+                ':owner' : owner,
+            }),
+        )
+
+    def _release(self, key, owner):
+        from botocore.exceptions import ClientError
+        try:
+            dynamodb_client().delete_item(
+                TableName=self.table_name,
+                Key=self._key(key),
+                ConditionExpression='#o = :owner',
+                ExpressionAttributeNames={'#o': 'owner'},
+                ExpressionAttributeValues={':owner': {'S': owner}},
+            )
+        except ClientError:
+            pass
+
+    def run(self, key, fn, timeout=25):
+        owner    = uuid.uuid4().hex
+        deadline = time.monotonic() + timeout
+        while True:
+            if self._acquire(key, owner):
+                try:
+                    result = fn()
+                except Exception:
+                    self._release(key, owner)   # 기다리던 요청이 바로 리더를 이어받게 한다
+                    raise
+                try:
+                    self._publish(key, owner, result)
+                except Exception as e:
+                    print("Coalescing result publish failed:", str(e))
+                return result
+
+            # 팔로워: 리더의 결과를 기다린다 (replay 가 아니면 임대를 못 얻은 것이 곧 생성 중에 왔다는 뜻)
+            item = None
+            while time.monotonic() < deadline:
+                item = dynamodb_client().get_item(TableName=self.table_name, Key=self._key(key),
+                                                  ConsistentRead=True).get('Item')
+                item = item and from_attributes(item)
+                if item is None or int(item['expires_at']) < time.time():
+                    break   # 리더가 사라졌거나 임대가 끝남 -> 다시 리더 시도
+                if item.get('status') == 'done':
+                    return json.loads(item['result'])
+                time.sleep(min(self.poll_interval, max(0.0, deadline - time.monotonic())))
+            else:
+                # 기다려도 결과가 없으면 생성하지 않고 리더가 끝날 즈음 다시 오게 한다
+                raise StillRunning(int(item['expires_at']) - time.time() if item else self.lease_seconds)
+
+
+class ResultCache:
+    # DynamoLease 대신 쓰는 컨테이너 메모리 결과 저장소 (진행 중 요청 묶기는 SingleFlight 가 한다)
+    def __init__(self, result_seconds=30):
+        self.result_seconds = result_seconds
+        self._results       = {}   # key -> (만료 시각, 결과)
+        self._lock          = threading.Lock()
+
+    def run(self, key, fn, timeout=None):
+        now = time.monotonic()
+        with self._lock:
+            hit = self._results.get(key)
+            if hit is not None and hit[0] > now:
+                return _copy(hit[1])
+        result = fn()
+        with self._lock:
+            for k in [k for k, (exp, _) in self._results.items() if exp <= now]:
+                del self._results[k]
+            self._results[key] = (now + self.result_seconds, result)
+        return result
+
+
+class Coalescer:
+    def __init__(self, lease=None, timeout=25):
+        self.flight  = SingleFlight()
+        self.lease   = lease
+        self.timeout = timeout   # 팔로워가 결과를 기다리는 최대 시간
+
+    def run(self, key, fn, timeout=None):
+        # timeout: 이번 요청에서 팔로워로 기다려도 되는 시간 (없으면 self.timeout)
+        wait = self.timeout if timeout is None else min(self.timeout, timeout)
+        if self.lease is None:
+            return self.flight.do(key, fn, timeout=wait)
+        return self.flight.do(key, lambda: self.lease.run(key, fn, timeout=wait), timeout=wait)
@@ -0,0 +1,23 @@
+# index.html 의 topicsMap 과 같은 교육과정 (3학년)
+
+GRADE = '3'
+
+TOPICS = {
+    '1단원': ['세 자리 수의 덧셈', '세 자리 수의 뺄셈'],
+    '2단원': ['직각 삼각형', '직사각형', '정사각형'],
+    '3단원': ['두 자릿 수 ÷ 한 자릿 수'],
+    '4단원': ['(몇 십) × (몇)', '(몇십몇) × (몇)'],
+    '5단원': ['시간의 덧셈', '시간의 뺄셈'],
+    '6단원': ['분수 비교', '소수 비교'],
+}
+
+QUESTION_TYPES = ['객관식', '단답형']
+KINDS          = ['calc', 'word']
+
+def iter_bank_keys():
+    # (학년, 단원, 주제, 유형, 계산/문장제) 전체
+    for unit, topics in TOPICS.items():
+        for topic in topics:
+            for qtype in QUESTION_TYPES:
+                for kind in KINDS:
+                    yield (GRADE, unit, topic, qtype, kind)
@@ -0,0 +1,200 @@
+import random
+from fractions import Fraction
+
+import calc_generator
+from calc_generator import format_time
+from sharding import apportion
+
+# 계산 문항의 정답으로부터 학생들이 흔히 저지르는 실수를 흉내 내 오답 선지를 만든다.
+# (받아올림 누락, 받아내림 오류, 자릿수 뒤바뀜, 10 차이, 나머지 누락 등)
+# 정답 위치는 학습지 전체에서 2번 30% / 3번 30% / 4번 40% 가 정확히 맞도록 배정한다.
+
+ANSWER_SHARES = (0, 3, 3, 4)   # 1~4번 선지에 정답이 놓일 비율 (1번은 사용하지 않음)
+
+def _digits(n):
+    return [int(d) for d in reversed(str(n))]
+
+def _from_digits(ds):
+    return int(''.join(str(d) for d in reversed(ds)))
+
+def _transpositions(value):
+    s   = str(value)
+    out = []
+    for i in range(len(s) - 1):
+        if s[i] != s[i + 1]:
+            t = s[:i] + s[i + 1] + s[i] + s[i + 2:]
+            if t[0] != '0':
+                out.append(int(t))
+    return out
+
+def _add_errors(a, b, value):
+    # 받아올림 누락: 자리마다 합의 일의 자리만 적는다
+    da, db = _digits(a), _digits(b)
+    no_carry = _from_digits([(x + y) % 10 for x, y in zip(da, db)])
+    return [no_carry, value - 10, value + 10, value - 100, value + 100] + _transpositions(value)
+
+def _sub_errors(a, b, value):
+    # 받아내림 오류: 자리마다 큰 수에서 작은 수를 뺀다 / 받아내림 후 윗자리를 그대로 둔다
+    da, db = _digits(a), _digits(b)
+    swap   = _from_digits([abs(x - y) for x, y in zip(da, db)])
+    keep   = _from_digits([(x - y) % 10 for x, y in zip(da, db)])
+    return [swap, keep, value + 10, value - 10, value + 100] + _transpositions(value)
+
+def _mul_errors(a, b, value):
+    # 올림 누락: 자리 곱의 일의 자리만 쓰고 맨 윗자리만 그대로 쓴다
+    da  = _digits(a)
+    low = [(d * b) % 10 for d in da[:-1]]
+    no_carry = int(str(da[-1] * b) + ''.join(str(d) for d in reversed(low)))
+    errors = [no_carry, value + 10, value - 10, value + b, value - b] + _transpositions(value)
+    if a % 10 == 0:
+        errors = [value // 10, value * 10] + errors   # 0 을 빠뜨리거나 하나 더 붙임
+    return errors
+
+def _time_errors(a, b, value, op):
+    (h1, m1), (h2, m2) = divmod(a, 60), divmod(b, 60)
+    if op == 'time_add':
+        raw = [f"{h1 + h2}시간 {m1 + m2}분"] if m1 + m2 >= 60 else []       # 60분을 올리지 않음
+        raw.append(format_time(value + 40) if m1 + m2 >= 60 else format_time(value + 60))
+    else:
+        raw = []
+        if m1 < m2:
+            raw.append(format_time(value + 40))                            # 1시간을 100분으로 받아내림
+            raw.append(f"{h1 - h2}시간 {m2 - m1}분")                        # 큰 분에서 작은 분을 뺌
+    raw += [format_time(v) for v in (value - 10, value + 10, value - 60, value + 60) if v > 0]
+    return raw
+
+def _div_errors(a, b, q, r):
+    if r:
+        return [f"몫 {q}, 나머지 0",           # 나머지 누락
+                f"몫 {q - 1}, 나머지 {r + b}",  # 덜 나눔
+                f"몫 {r}, 나머지 {q}",          # 몫과 나머지를 바꿈
+                f"몫 {q + 1}, 나머지 {r}",
+                f"몫 {q}, 나머지 {r + 1}"]
+    return [str(v) for v in [q + 1, q - 1, q + 10, q - 10] + _transpositions(q) if v > 0]
+
+def format_value(calc):
+    op, value = calc['op'], calc['value']
+    if op in ('time_add', 'time_sub'):
+        return format_time(value)
+    if op == 'div':
+        q, r = value
+        return f"몫 {q}, 나머지 {r}" if r else str(q)
+    return str(value)
+
+def distractors(calc, rng, k=3):
+    op, (a, b), value = calc['op'], calc['operands'], calc['value']
+    if op == 'add':
+        raw = _add_errors(a, b, value)
+    elif op == 'sub':
+        raw = _sub_errors(a, b, value)
+    elif op == 'mul':
+        raw = _mul_errors(a, b, value)
+    elif op == 'div':
+        raw = _div_errors(a, b, *value)
+    else:
+        raw = _time_errors(a, b, value, op)
+
+    correct = format_value(calc)
+    picked  = []
+    for v in raw:
+        if isinstance(v, int) and v <= 0:
+            continue
+        v = str(v)
+        if v != correct and v not in picked:
+            picked.append(v)
+
+    # 흔한 실수 중 앞쪽(받아올림/받아내림 계열)은 최대한 살리고 나머지는 섞어서 고른다
+    head, tail = picked[:1], picked[1:]
+    rng.shuffle(tail)
+    picked = (head + tail)[:k]
+
+    step = 1
+    while len(picked) < k and isinstance(value, int):
+        for v in (value + step, value - step):
+            if v > 0 and str(v) not in picked and len(picked) < k:
+                picked.append(str(v))
+        step += 1
+    return picked
+
+def _compare_options(calc, rng):
+    # 비교 문항 객관식: 같은 종류의 수 4개 중 가장 큰 수를 고르게 한다
+    x, y = calc['operands']
+    if '/' in x:
+        (nx, dx), (ny, dy) = (map(int, v.split('/')) for v in (x, y))
+        if nx == ny == 1:
+            pool = [f"1/{d}" for d in range(2, 13)]     # 분모가 큰 쪽을 고르는 실수를 유도
+        else:
+            if dx < 5:
+                # 분모가 작으면 네 개를 채울 수 없어 분모를 키워 같은 유형으로 낸다
+                dx   = 5 + (nx + ny) % 4
+                x, y = rng.sample([f"{n}/{dx}" for n in range(1, dx)], 2)
+            pool = [f"{n}/{dx}" for n in range(1, dx)]
+        key = Fraction
+    else:
+        tx, ty = (int(v.replace('.', '')) for v in (x, y))
+        swap   = int(f"{tx:02d}"[::-1])                  # 자연수 부분과 소수 부분을 뒤바꿈
+        pool   = [f"{v // 10}.{v % 10}" for v in (swap, tx + 1, tx - 1, ty + 10, ty - 10, tx + 2, tx - 2) if 0 < v < 100]
+        key    = float
+
+    values = list(dict.fromkeys([x, y] + pool))
+    picked = values[:2] + rng.sample(values[2:], min(2, len(values) - 2))
+    best   = max(picked, key=key)
+    return best, [v for v in picked if v != best]
+
+def answer_slots(n, rng):
+    # 정답 위치(0-based) n 개를 비율대로 정확히 나눈 뒤 섞는다
+    counts = apportion(n, ANSWER_SHARES) if n else [0] * len(ANSWER_SHARES)
+    slots  = [i for i, c in enumerate(counts) for _ in range(c)]
+    rng.shuffle(slots)
+    return slots
+
+class AnswerPlacer:
+    # 학습지 한 장의 객관식 문항에 정답 위치를 차례로 배정한다
+    def __init__(self, mc_count, seed=None):
+        self.rng   = random.Random(seed)
+        self.slots = answer_slots(mc_count, self.rng)
+
+    def _next_slot(self):
+        if self.slots:
+            return self.slots.pop()
+        return answer_slots(1, self.rng)[0]
+
+    def place(self, q):
+        # 모델이 만든 객관식: 정답 선지를 배정된 자리로 옮긴다
+        options = q.get('options') or []
+        idx     = q.get('answerIndex')
+        if len(options) != len(ANSWER_SHARES) or not isinstance(idx, int) or not 0 <= idx < len(options):
+            return q
+        slot = self._next_slot()
+        options[idx], options[slot] = options[slot], options[idx]
+        q['answerIndex'] = slot
+        return q
+
+    def build(self, q):
+        # 로컬 계산 문항: 오답 선지를 만들어 배정된 자리에 정답을 둔다
+        calc = q['_calc']
+        if calc['op'] == 'compare':
+            correct, wrong = _compare_options(calc, self.rng)
+        else:
+            correct, wrong = format_value(calc), distractors(calc, self.rng)
+        slot    = self._next_slot()
+        options = list(wrong)
+        self.rng.shuffle(options)
+        options.insert(slot, correct)
+        q['options']     = options
+        q['answerIndex'] = slot
+        if calc['op'] == 'compare':
+            # 수를 문장에 넣어야 문항마다 문장이 달라 병합 때 중복으로 빠지지 않는다
+            q['stem'] = f"{', '.join(options)} 중에서 가장 큰 수는 무엇인가요?"
+        q.pop('answer', None)
+        return q
+
+def local_questions(topic, question_type, n, seed=None):
+    # 한 유형으로만 된 로컬 계산 문항 n 개 (문제 은행 보충용)
+    items  = calc_generator.generate(topic, n, seed)
+    placer = AnswerPlacer(len(items), seed)
+    for q in items:
+        if question_type == "객관식":
+            placer.build(q)
+        q.pop('_calc', None)
+    return items
@@ -0,0 +1,107 @@
+import time
+import queue
+import threading
+import contextvars
+from collections import deque
+
+from https_pool import CancelToken
+
+# OpenAI 꼬리 지연을 줄이는 헤지 요청.
+# 첫 요청이 최근 지연 분포의 percentile 시점까지 끝나지 않으면 같은 요청을 하나 더 보내고,
+# 먼저 끝난 쪽을 쓰고 나머지는 CancelToken 으로 끊는다.
+# 지연 분포는 키(모델)별로 최근 window 개만 유지하므로 임계값이 스스로 따라 움직인다.
+
+class LatencyWindow:
+    def __init__(self, window=200):
+        self._samples = deque(maxlen=window)
+        self._lock    = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, p):
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(p * len(samples)))]
+
+    def __len__(self):
+        return len(self._samples)
+
+
+class Hedger:
+    def __init__(self, percentile=0.9, default_delay=8.0, min_delay=1.0, min_samples=20,
+                 window=200, max_hedges=1):
+        self.percentile    = percentile
+        self.default_delay = default_delay   # 표본이 모이기 전 임계값(초)
+        self.min_delay     = min_delay
+        self.min_samples   = min_samples
+        self.window        = window
+        self.max_hedges    = max_hedges
+        self.stats         = {'calls': 0, 'hedged': 0, 'hedge_wins': 0}
+        self._windows      = {}
+        self._lock         = threading.Lock()
+
+    def latencies(self, key):
+        with self._lock:
+            if key not in self._windows:
+                self._windows[key] = LatencyWindow(self.window)
+            return self._windows[key]
+
+    def threshold(self, key):
+        window = self.latencies(key)
+        if len(window) < self.min_samples:
+            return self.default_delay
+        return max(self.min_delay, window.percentile(self.percentile))
+
+    def run(self, key, attempt):
+        # attempt(cancel_token) -> 결과. 모든 시도가 실패하면 마지막 예외를 올린다.
+        delay   = self.threshold(key)
+        results = queue.Queue()
+        tokens  = []
+
+        def launch():
+            token = CancelToken()
+            tokens.append(token)
+            index = len(tokens) - 1
+            start = time.monotonic()
+
+            def work():
+                try:
+                    value = attempt(token)
+                except Exception as e:
+                    results.put((index, False, e, None))
+                else:
+                    results.put((index, True, value, time.monotonic() - start))
+
+            threading.Thread(target=contextvars.copy_context().run, args=(work,), daemon=True).start()
+
+        with self._lock:
+            self.stats['calls'] += 1
+        launch()
+        failed = 0
+        while True:
+            can_hedge = len(tokens) <= self.max_hedges
+            try:
+                index, ok, value, elapsed = results.get(timeout=delay if can_hedge else None)
+            except queue.Empty:
+                with self._lock:
+                    self.stats['hedged'] += 1
+                launch()
+                continue
+
+            if ok:
+                self.latencies(key).add(elapsed)
+                for i, token in enumerate(tokens):
+                    if i != index:
+                        token.cancel()
+                if index:
+                    with self._lock:
+                        self.stats['hedge_wins'] += 1
+                return value
+
+            failed += 1
+            if failed == len(tokens):
+                raise value
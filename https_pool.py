@@ -0,0 +1,146 @@
+import time
+import select
+import socket
+import threading
+from contextlib import contextmanager
+
+# 웜 컨테이너에서 재사용하는 keep-alive HTTPS 연결 풀.
+# 모듈 전역으로 두면 Lambda 호출 사이에도 연결과 SSL 컨텍스트가 살아남는다.
+
+_ssl_context = None
+_ssl_lock    = threading.Lock()
+
+# ssl / http.client 는 첫 연결 때 불러온다 (조회·은행 응답만 하는 호출은 필요 없다)
+
+def _stale_errors():
+    # 재사용한 연결이 이미 끊겨 있었을 때 나는 예외들
+    import http.client
+    return (
+        http.client.RemoteDisconnected,
+        http.client.CannotSendRequest,
+        http.client.BadStatusLine,
+        ConnectionResetError,
+        BrokenPipeError,
+    )
+
+def ssl_context():
+    # 인증서 로딩은 컨테이너당 한 번만
+    global _ssl_context
+    if _ssl_context is None:
+        with _ssl_lock:
+            if _ssl_context is None:
+                import ssl
+                _ssl_context = ssl.create_default_context()
+    return _ssl_context
+
+
+class CancelToken:
+    # 다른 스레드에서 진행 중인 요청을 끊는다 (소켓을 shutdown 해 막힌 read 를 깨운다).
+    # 끊긴 연결은 예외와 함께 닫히고 풀로 돌아가지 않는다.
+    def __init__(self):
+        self.cancelled = False
+        self._conn     = None
+        self._lock     = threading.Lock()
+
+    def bind(self, conn):
+        with self._lock:
+            self._conn = conn
+            if self.cancelled:
+                _abort(conn)
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+            if self._conn is not None:
+                _abort(self._conn)
+
+def _abort(conn):
+    try:
+        if conn.sock is not None:
+            conn.sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+
+class HTTPSPool:
+    def __init__(self, host, timeout=None, idle_timeout=50, max_idle=4):
+        self.host         = host
+        self.timeout      = timeout
+        self.idle_timeout = idle_timeout   # 서버가 유휴 연결을 끊기 전에 버린다
+        self.max_idle     = max_idle
+        self._idle        = []             # [(conn, 마지막 사용 시각), ...]
+        self._lock        = threading.Lock()
+
+    def _connect(self):
+        import http.client
+        return http.client.HTTPSConnection(self.host, timeout=self.timeout, context=ssl_context())
+
+    def connect(self):
+        # 미리 연결을 열어 유휴 목록에 넣어 둔다 (TLS 핸드셰이크 선행)
+        conn = self._connect()
+        conn.connect()
+        self._put(conn)
+
+    def _is_stale(self, conn, last_used):
+        if conn.sock is None or time.monotonic() - last_used > self.idle_timeout:
+            return True
+        # 요청이 없는데 읽을 게 있다면 서버가 닫았거나(EOF) 상태가 어긋난 소켓이다
+        try:
+            readable, _, _ = select.select([conn.sock], [], [], 0)
+        except (OSError, ValueError):
+            return True
+        return bool(readable)
+
+    def _get(self):
+        with self._lock:
+            while self._idle:
+                conn, last_used = self._idle.pop()
+                if not self._is_stale(conn, last_used):
+                    return conn, True
+                conn.close()
+        return self._connect(), False
+
+    def _put(self, conn):
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append((conn, time.monotonic()))
+                return
+        conn.close()
+
+    def _release(self, conn, res):
+        # 응답을 끝까지 읽은 연결만 돌려놓는다
+        if res is not None and res.isclosed() and not res.will_close:
+            self._put(conn)
+        else:
+            conn.close()
+
+    @contextmanager
+    def request(self, method, path, body=None, headers=None, cancel=None):
+        for attempt in range(2):
+            conn, reused = self._get()
+            try:
+                conn.request(method, path, body, headers or {})
+                if cancel is not None:
+                    cancel.bind(conn)
+                res = conn.getresponse()
+                break
+            except _stale_errors():
+                conn.close()
+                if not reused or attempt or (cancel is not None and cancel.cancelled):
+                    raise
+            except Exception:
+                conn.close()
+                raise
+
+        try:
+            yield res
+        except BaseException:
+            conn.close()
+            raise
+        self._release(conn, res)
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            conn.close()
@@ -0,0 +1,144 @@
+import re
+import json
+
+# LLM 출력에서 최상위 JSON 배열의 원소를 조각 단위로 꺼내는 점진 파서.
+# 배열 앞뒤의 ```json 펜스나 설명 문장은 무시하고, 출력이 중간에 잘려도
+# 이미 닫힌 원소는 그대로 살린다.
+
+_SPECIAL     = re.compile(r'[\[\]{}",\\]')
+_VALUE_START = set('{["-0123456789]')
+
+
+class ArrayStreamParser:
+    def __init__(self):
+        self.errors   = []      # 파싱에 실패한 원소 원문
+        self.started  = False   # 배열 '[' 를 찾았는지
+        self.done     = False   # 배열 ']' 까지 닫혔는지
+        self._probe   = False   # 직전 조각이 '[' 로 끝나 확인 대기 중
+        self._depth   = 0
+        self._in_str  = False
+        self._esc     = False
+        self._parts   = []
+        self._count   = 0
+
+    @property
+    def truncated(self):
+        return self.started and not self.done
+
+    def feed(self, text):
+        out = []
+        if self.done or not text:
+            return out
+
+        i = 0
+        if not self.started:
+            i = self._find_start(text)
+            if i is None:
+                return out
+
+        seg     = i
+        esc_pos = i if self._esc else -1
+        self._esc = False
+
+        for m in _SPECIAL.finditer(text, i):
+            pos = m.start()
+            ch  = m.group()
+            if pos == esc_pos:
+                continue
+            if self._in_str:
+                if ch == '\\':
+                    esc_pos = pos + 1
+                elif ch == '"':
+                    self._in_str = False
+                continue
+
+            if ch == '"':
+                self._in_str = True
+            elif ch in '[{':
+                self._depth += 1
+            elif ch in ']}':
+                if self._depth == 0:
+                    # ']' 로 최상위 배열 종료
+                    self._emit(text[seg:pos], out)
+                    if not self._count and self.errors:
+                        # 원소가 하나도 안 읽힌 '[...]' 는 설명 문장으로 보고 다시 찾는다
+                        self.started = False
+                        return out + self.feed(text[pos + 1:])
+                    self.done = True
+                    return out
+                self._depth -= 1
+                if self._depth == 0:
+                    self._emit(text[seg:pos + 1], out)
+                    seg = pos + 1
+            elif ch == ',' and self._depth == 0:
+                self._emit(text[seg:pos], out)
+                seg = pos + 1
+
+        if esc_pos == len(text):
+            self._esc = True
+        self._parts.append(text[seg:])
+        return out
+
+    def close(self):
+        # 잘린 마지막 원소는 버린다; 이미 돌려준 원소는 유효하다
+        self._parts = []
+        return []
+
+    def _find_start(self, text):
+        i = 0
+        if self._probe:
+            self._probe = False
+            j = self._skip_ws(text, 0)
+            if j is None:
+                self._probe = True
+                return None
+            if text[j] in _VALUE_START:
+                self.started = True
+                return 0
+        while True:
+            k = text.find('[', i)
+            if k < 0:
+                return None
+            j = self._skip_ws(text, k + 1)
+            if j is None:
+                self._probe = True
+                return None
+            if text[j] in _VALUE_START:
+                self.started = True
+                return k + 1
+            i = k + 1
+
+    @staticmethod
+    def _skip_ws(text, i):
+        while i < len(text) and text[i].isspace():
+            i += 1
+        return i if i < len(text) else None
+
+    def _emit(self, tail, out):
+        self._parts.append(tail)
+        raw = ''.join(self._parts).strip()
+        self._parts = []
+        if not raw:
+            return
+        try:
+            out.append(json.loads(raw))
+            self._count += 1
+        except ValueError:
+            self.errors.append(raw)
+
+
+def iter_array(chunks):
+    parser = ArrayStreamParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    parser.close()
+
+
+def parse_array(text):
+    # (원소 목록, 배열이 끝까지 닫혔는지) 를 돌려준다
+    parser = ArrayStreamParser()
+    items  = parser.feed(text)
+    parser.close()
+    if not parser.started:
+        raise ValueError("cannot find a JSON array in the response")
+    return items, parser.done
@@ -1,130 +1,639 @@
 import os
 import json
-import boto3
-import http.client
+import math
+import time
+import hashlib
+from collections import Counter
+
+from circuit_breaker import CircuitBreaker, CircuitOpen
+from coalesce import Coalescer, DynamoLease, ResultCache, StillRunning, coalesce_key
+from curriculum import QUESTION_TYPES, TOPICS, iter_bank_keys
+from hedging import Hedger
+from https_pool import HTTPSPool, ssl_context
+from json_stream import iter_array, parse_array
+from prompts import MODEL, PROMPT_VERSION, build_prompt, chat_body, record_usage
+from persist_spool import QueueSpool
+from rate_limit import TOKENS_PER_ITEM, RateLimited, estimate_tokens, open_limiter
+import question_schema
+from question_bank import QuestionBank, open_store
+import calc_generator
+from distractors import AnswerPlacer, local_questions
+from verify import check, repair, verify_questions
+from token_budget import TokenBudget, collecting
+from selection import is_valid, select_questions
+from sharding import generate_sharded, merge_questions, plan_shards, plan_slots, stem_key
+from worksheet_cache import LRUCache, etag_matches
+from worksheet_store import open_worksheet_store
 
 OPENAI_KEY     = os.getenv('OPENAI_API_KEY')
 DYNAMODB_TABLE = os.getenv('DYNAMODB_TABLE')
+SHARD_SIZE     = int(os.getenv('SHARD_SIZE', '0'))   # 0 이면 한 번에 생성
+LOCAL_CALC     = os.getenv('LOCAL_CALC', '1') == '1'  # 계산 문항은 규칙 생성기로
+QUESTION_BANK  = os.getenv('QUESTION_BANK', '')       # memory | sqlite:<path> | dynamodb:<table>
+COALESCE_TABLE = os.getenv('COALESCE_TABLE')          # 컨테이너 간 요청 묶기용 임대 테이블
+STORAGE_LAYOUT = os.getenv('STORAGE_LAYOUT', 'rows')  # rows: 문항별 항목 / single: 학습지 한 항목
+# memory | sqlite:<path> | dynamodb:<table> | sqlite:<path>+dynamodb:<table> (SQLite 읽기 캐시)
+WORKSHEET_STORE = os.getenv('WORKSHEET_STORE') or f'dynamodb:{DYNAMODB_TABLE}'
+PERSIST_MODE   = os.getenv('PERSIST_MODE', 'sync')    # sync: 저장 후 응답 / sqs:<queue_url>: 큐에 넣고 응답
+CACHE_BYTES    = int(os.getenv('WORKSHEET_CACHE_BYTES', str(16 * 1024 * 1024)))  # 조회 캐시 크기
+IDEMPOTENCY_TTL = int(os.getenv('IDEMPOTENCY_TTL', '86400'))  # 멱등 키 응답 보관 시간(초)
+STRUCTURED_OUTPUT = os.getenv('STRUCTURED_OUTPUT', '0') == '1'  # response_format 스키마 + 문항별 검증
+OPENAI_TIMEOUT   = float(os.getenv('OPENAI_TIMEOUT', '25'))      # 소켓 읽기 제한(초)
+HEDGE_PERCENTILE = float(os.getenv('HEDGE_PERCENTILE', '0.9'))   # 0 이면 헤지 요청을 쓰지 않는다
+HEDGE_DELAY      = float(os.getenv('HEDGE_DELAY', '8'))          # 지연 표본이 모이기 전 헤지 시점(초)
+CIRCUIT_BREAKER  = os.getenv('CIRCUIT_BREAKER', '1') == '1'      # OpenAI 장애 시 로컬/은행으로 대신 응답
+RATE_LIMIT       = os.getenv('RATE_LIMIT', '')                   # '' | local | dynamodb:<table>
+OPENAI_RPM       = int(os.getenv('OPENAI_RPM', '500'))
+OPENAI_TPM       = int(os.getenv('OPENAI_TPM', '200000'))
+RATE_LIMIT_WAIT  = float(os.getenv('RATE_LIMIT_WAIT', '5'))      # 이보다 오래 기다려야 하면 429
+TOKEN_BUDGET     = os.getenv('TOKEN_BUDGET', '1') == '1'         # 지난 usage 로 max_tokens 를 정한다
+OVERGENERATE     = float(os.getenv('OVERGENERATE', '0.2'))       # 더 요청할 문항 비율 (골라 쓰기용)
+MAX_COUNT        = int(os.getenv('MAX_COUNT', '30'))             # 학습지 하나의 최대 문항 수
+REQUEST_BUDGET   = float(os.getenv('REQUEST_BUDGET', '29'))      # API Gateway 통합 제한(초)
+FOLLOWER_SHARE   = float(os.getenv('FOLLOWER_SHARE', '0.6'))     # 남은 시간 중 같은 요청의 결과를 기다릴 몫
+
+storage = open_worksheet_store(WORKSHEET_STORE, STORAGE_LAYOUT)
+
+# 웜 컨테이너에서 재사용되는 OpenAI keep-alive 연결
+openai_pool = HTTPSPool("api.openai.com", timeout=OPENAI_TIMEOUT)
+
+# 느린 요청은 같은 요청을 하나 더 보내 먼저 끝난 쪽을 쓴다
+hedger = Hedger(HEDGE_PERCENTILE, HEDGE_DELAY) if HEDGE_PERCENTILE > 0 else None
+
+# 실패·지연이 몰리면 OpenAI 호출을 잠시 멈추고 degraded 응답을 낸다
+breaker = CircuitBreaker(ignore=(RateLimited,)) if CIRCUIT_BREAKER else None
+
+# RPM/TPM 한도 안에서만 보낸다 (모자라면 잠깐 기다리거나 돌려보낸다)
+limiter = open_limiter(RATE_LIMIT, OPENAI_RPM, OPENAI_TPM, RATE_LIMIT_WAIT) if RATE_LIMIT else None
 
-dynamodb = boto3.resource('dynamodb')
-table    = dynamodb.Table(DYNAMODB_TABLE)
-
-def call_openai(count, question_type, topic):
-    conn = http.client.HTTPSConnection("api.openai.com")
-
-    # 1) 기본 설명
-    prompt = (
-        f"Generate {count} questions in Korean for elementary school students on the topic '{topic}'. "
-        "Questions should be either pure calculation or concise two-line sentence-form word problems. "
-    )
-
-    # 2) 객관식 / 단답형 / 반반 분기
-    if question_type == "객관식":
-        prompt += (
-            "Make all questions multiple-choice with 4 distinct options each (no labels like ①–⑤). "
-            "Never place the correct answer in option 1. "
-            "Across the set, distribute correct answers approximately 30% in option 2, 30% in option 3, and 40% in option 4. "
-        )
-    elif question_type == "단답형":
-        prompt += "Make all questions short-answer style (no options). "
-    else:  # 반반
-        prompt += (
-            "For half the questions, make multiple-choice with 4 distinct options each, never option 1, "
-            "distributing correct answers ~30% in option 2, ~30% in option 3, and ~40% in option 4. "
-            "For the other half, make short-answer style (no options). "
-        )
-
-    # 3) 계산 vs 문장제 비율
-    prompt += (
-        "Make 80% of the total questions pure calculation format "
-        "(e.g., “30 x 4 = ?”, “125 + 354를 구하세요.”) and 20% sentence-form word problems. "
-    )
-
-    # 4) 문장제 형식 예시 (스타일 참고용)
-    prompt += (
-        "Here are style examples (do not copy verbatim):\n"
-        "- 예서는 오전에 딸기를 232개, 오후에는 143개 땄습니다. 예서가 딴 딸기는 모두 몇 개 인가요?\n"
-        "- 오징어 20마리를 4개의 봉지에 똑같이 나누어 담으면 한 봉지에 몇 마리씩 담을 수 있나요?\n"
-        "- 채원이는 한 박스에 플라스틱병을 16개씩 담았습니다. 4박스를 가득 담았다면 총 몇 개인가요?\n"
-        f"Each word problem must be concise (max two lines) and reflect the selected topic '{topic}'. "
-    )
-
-    # 5) 조언 포함 및 출력 형식
-    prompt += (
-        "Include a one-line advice for each question that helps solve it. "
-        "Return a JSON array of objects with keys: "
-        "number (int), stem (string), options (array of strings if any), "
-        "answerIndex (0-based) or answer (string), advice (string)."
-    )
-
-    payload = json.dumps({
-        "model": "gpt-4o-mini",
-        "messages": [
-            {"role": "system", "content": "You are a helpful teacher."},
-            {"role": "user",   "content": prompt}
-        ],
-        "temperature": 0.7
-    })
+# (유형, 주제) 별 문항당 출력 토큰 -> max_tokens
+budget = TokenBudget() if TOKEN_BUDGET else None
+
+# 학습지 조회(GET) 응답 캐시 — 학습지는 만들어진 뒤 바뀌지 않는다
+worksheet_cache = LRUCache(CACHE_BYTES)
+
+# 같은 설정의 동시 요청은 생성 한 번을 나눠 쓴다
+coalescer = Coalescer(DynamoLease(COALESCE_TABLE) if COALESCE_TABLE else None)
+
+# Idempotency-Key 가 같은 재시도는 첫 응답을 그대로 돌려받고, 진행 중이면 그 결과를 기다린다
+idempotency = Coalescer(
+    DynamoLease(COALESCE_TABLE, lease_seconds=120, result_seconds=IDEMPOTENCY_TTL, replay=True)
+    if COALESCE_TABLE else ResultCache(IDEMPOTENCY_TTL),
+)
+
+def _structured():
+    # pydantic 이 없으면 자유 형식 응답으로 돌아간다
+    return STRUCTURED_OUTPUT and question_schema.available()
+
+def _chat_request(prompt, stream=False, cancel=None, max_tokens=None):
+    payload = chat_body(prompt, max_tokens=max_tokens)
+    if stream:
+        payload["stream"] = True
+        payload["stream_options"] = {"include_usage": True}   # 마지막 청크에 usage
     headers = {
         'Content-Type': 'application/json',
         'Authorization': f'Bearer {OPENAI_KEY}'
     }
+    return openai_pool.request("POST", "/v1/chat/completions", json.dumps(payload), headers, cancel=cancel)
+
+def call_openai(count, question_type, topic, word_count=None, remainder=False):
+    if breaker is None:
+        return _call_openai_hedged(count, question_type, topic, word_count, remainder)
+    return breaker.call(lambda: _call_openai_hedged(count, question_type, topic, word_count, remainder))
 
-    conn.request("POST", "/v1/chat/completions", payload, headers)
-    res  = conn.getresponse()
-    body = res.read().decode()
+def _call_openai_hedged(count, question_type, topic, word_count=None, remainder=False):
+    if hedger is None:
+        return _call_openai_once(count, question_type, topic, word_count, remainder=remainder)
+    return hedger.run(MODEL, lambda cancel: _call_openai_once(count, question_type, topic, word_count,
+                                                              cancel, remainder))
+
+def _budget_for(count, question_type, topic):
+    # (max_tokens, 문항당 출력 토큰 어림)
+    if budget is None:
+        return None, TOKENS_PER_ITEM
+    # 저장소가 주제별 조회를 못 하면 (rows 형식 등) 요청 경로에서 읽지 않고 이 컨테이너 표본만 쓴다
+    if storage.supports_topic_query and budget.needs_load(question_type, topic):
+        try:
+            budget.load(question_type, topic, [meta for meta, _ in storage.query_by_topic(topic, 20)])
+        except Exception as e:
+            print("Token budget load failed:", str(e))
+    return budget.max_tokens(question_type, topic, count), budget.per_item(question_type, topic)
+
+def _remainder_words(count, word_count, missing):
+    # 모자란 문항의 문장제 수 (원래 요청의 비율 유지)
+    if word_count is None or word_count == 0:
+        return word_count
+    return min(missing, round(word_count * missing / count))
+
+def _call_openai_once(count, question_type, topic, word_count=None, cancel=None, remainder=False):
+    prompt                = build_prompt(count, question_type, topic, word_count, _structured())
+    max_tokens, per_item  = _budget_for(count, question_type, topic)
+    estimated = limiter.acquire(estimate_tokens(prompt.messages, count, per_item)) if limiter else 0
+
+    with _chat_request(prompt, cancel=cancel, max_tokens=max_tokens) as res:
+        body = res.read().decode()
 
     if res.status != 200:
         raise Exception(f"OpenAI API error {res.status}: {body}")
 
     data = json.loads(body)
     raw  = data["choices"][0]["message"]["content"]
+    record_usage(prompt.template_id, data.get("usage"))
+    if limiter is not None:
+        limiter.settle(estimated, data.get("usage"))
+
+    # JSON 배열만 추출 (잘린 응답이면 완성된 문항까지만 사용)
+    try:
+        arr, complete = parse_array(raw)
+    except ValueError as e:
+        raise Exception(f"JSON parsing error: {e}\nRaw response:\n{raw}")
 
-    # JSON 배열만 추출
-    s = raw.find('[')
-    e = raw.rfind(']')
-    if s < 0 or e < 0:
-        raise Exception(f"JSON parsing error: cannot find array delimiters\nRaw response:\n{raw}")
+    arr = [q for q in arr if isinstance(q, dict)]
+    if prompt.structured:
+        arr = question_schema.validate_questions(arr)   # 틀린 문항만 버린다
+    if budget is not None:
+        budget.record(question_type, topic, data.get("usage"), len(arr))
 
-    arr = json.loads(raw[s:e+1])
-    if not isinstance(arr, list):
-        raise Exception(f"OpenAI response is not a list: {type(arr)}\nRaw response:\n{raw}")
+    # max_tokens 에서 잘렸으면 모자란 문항만 한 번 더 요청한다
+    missing = count - len(arr)
+    if data["choices"][0].get("finish_reason") == "length" and missing > 0 and not remainder:
+        print(f"Truncated OpenAI response, requesting the remaining {missing} of {count} questions")
+        try:
+            arr += call_openai(missing, question_type, topic,
+                               _remainder_words(count, word_count, missing), remainder=True)
+        except Exception as e:
+            print("Remainder request failed:", str(e))
+
+    if not arr:
+        raise Exception(f"OpenAI response has no complete questions\nRaw response:\n{raw}")
+    if not complete and len(arr) < count:
+        print(f"Truncated OpenAI response, keeping {len(arr)} of {count} questions")
 
     return arr
 
+def _placer_for(count, question_type, seed):
+    slots = plan_slots(count, question_type)
+    return AnswerPlacer(sum(t == "객관식" for t, _ in slots), seed)
+
+def _place(placer, q):
+    # 답 키를 먼저 검증·수정해야 정답 선지가 배정된 자리로 옮겨진다
+    check(q)
+    return placer.place(q)
+
+def _extra(n):
+    return math.ceil(n * OVERGENERATE) if OVERGENERATE > 0 else 0
+
+def generate_questions(count, question_type, topic, seed=None, grade=None, unit=None):
+    if question_bank is not None and grade is not None:
+        questions = questions_from_bank(count, question_type, topic, grade, unit, seed)
+        if questions:
+            return questions
+
+    placer = _placer_for(count, question_type, seed)
+    slots  = plan_slots(count, question_type)
+    local  = []
+    if LOCAL_CALC and calc_generator.supports(topic):
+        calc_types = [t for t, kind in slots if kind == 'calc']
+        local      = calc_generator.generate(topic, len(calc_types), seed)
+        for q, qtype in zip(local, calc_types):
+            if qtype == "객관식":
+                placer.build(q)
+            q.pop('_calc', None)
+        slots = [s for s in slots if s[1] != 'calc']
+
+    # 고칠 수 없는 객관식 계산 문항만 모델에 다시 요청한다
+    def regenerate(n):
+        return [_place(placer, q) for q in call_openai(n, "객관식", topic, word_count=0)]
+
+    if not OVERGENERATE and not local and not (SHARD_SIZE and count > SHARD_SIZE):
+        questions = [_place(placer, q) for q in call_openai(count, question_type, topic)]
+        return verify_questions(merge_questions([questions], count), regenerate)
+
+    # 모델 문항은 (유형, 계산/문장제) 칸마다 따로 넉넉히 받아 칸 안에서 점수 순으로 골라 쓴다.
+    # 계산·문장제를 한 호출에 섞으면 어느 문항이 어느 칸인지 알 수 없어 80/20 비율이 깨진다.
+    wants  = Counter(slots)
+    shards = []
+    for n, qtype, w in plan_shards(slots, SHARD_SIZE, by_kind=True):
+        k = _extra(n)
+        shards.append((n + k, qtype, w + k if w else 0))
+    batches = generate_sharded(call_openai, shards, topic) if slots else []
+    for (_, qtype, w), batch in zip(shards, batches):
+        for q in batch:
+            q['_slot'] = (qtype, 'word' if w else 'calc')
+    generated = select_questions([q for batch in batches for q in batch], len(slots), topic, wants)
+    questions = merge_questions([local, [_place(placer, q) for q in generated]], count)
+
+    # 실패했거나 중복으로 빠진 만큼만 한 번 더 채운다
+    missing = count - len(questions)
+    if missing > 0:
+        extra     = [_place(placer, q) for q in call_openai(missing, question_type, topic)]
+        questions = merge_questions([questions, extra], count)
+
+    verify_questions(questions, regenerate)
+
+    if question_type == "반반":
+        questions.sort(key=lambda q: not q.get('options'))
+        for i, q in enumerate(questions, 1):
+            q['number'] = i
+    return questions
+
+def degraded_questions(count, question_type, topic, seed=None, grade=None, unit=None):
+    # 모델 없이 만들 수 있는 학습지: 문제 은행, 아니면 로컬 계산 생성기. 둘 다 안 되면 None
+    if question_bank is not None and grade is not None:
+        questions = questions_from_bank(count, question_type, topic, grade, unit, seed)
+        if questions:
+            return questions
+    if not calc_generator.supports(topic):
+        return None
+
+    placer    = _placer_for(count, question_type, seed)
+    questions = calc_generator.generate(topic, count, seed)
+    for i, (q, (qtype, _)) in enumerate(zip(questions, plan_slots(count, question_type)), 1):
+        if qtype == "객관식":
+            placer.build(q)
+        q.pop('_calc', None)
+        q['number'] = i
+    return questions
+
+def _bank_refill(parts, n):
+    # 은행 보충: 계산 문항은 로컬 생성, 문장제는 모델에 10문항씩 나눠 요청
+    grade, unit, topic, qtype, kind = parts
+    if kind == 'calc' and calc_generator.supports(topic):
+        return local_questions(topic, qtype, n)
+
+    shards = plan_shards([(qtype, kind)] * n, 10)
+    # 형식이 틀린 문항은 은행에 넣지 않는다 (꺼내 쓸 때마다 학습지 저장이 실패한다)
+    items  = [q for batch in generate_sharded(call_openai, shards, topic) for q in batch if is_valid(q)]
+    for q in verify_questions(items):
+        q.pop('number', None)
+    return items
+
+question_bank = QuestionBank(open_store(QUESTION_BANK), _bank_refill) if QUESTION_BANK else None
+
+def questions_from_bank(count, question_type, topic, grade, unit, seed=None):
+    # 은행에 모든 칸을 채울 만큼 있을 때만 학습지를 만든다
+    wants   = Counter(plan_slots(count, question_type)).items()
+    batches = question_bank.draw([((grade, unit, topic, qtype, kind), n) for (qtype, kind), n in wants])
+    if batches is None or sum(map(len, batches)) < count:
+        return None
+
+    placer    = _placer_for(count, question_type, seed)
+    questions = [q for batch in batches for q in batch]
+
+    for i, q in enumerate(questions, 1):
+        placer.place(q)
+        q['number'] = i
+    return questions
+
+def _iter_sse_deltas(res, on_usage=None):
+    # "data: {...}" 줄 단위로 content 조각만 꺼낸다
+    while True:
+        line = res.readline()
+        if not line:
+            return
+        line = line.decode().strip()
+        if not line.startswith('data:'):
+            continue
+        data = line[5:].strip()
+        if data == '[DONE]':
+            res.read()   # 청크 종료까지 읽어야 연결을 재사용할 수 있다
+            return
+        chunk = json.loads(data)
+        if chunk.get('usage') and on_usage is not None:
+            on_usage(chunk['usage'])
+        for choice in chunk.get('choices', []):
+            delta = choice.get('delta', {}).get('content')
+            if delta:
+                yield delta
+
+def stream_openai(count, question_type, topic, word_count=None):
+    # 문항 객체가 닫히는 대로 하나씩 돌려준다 (stream: true 응답의 SSE 조각을 점진 파싱)
+    prompt               = build_prompt(count, question_type, topic, word_count, _structured())
+    max_tokens, per_item = _budget_for(count, question_type, topic)
+    estimated = limiter.acquire(estimate_tokens(prompt.messages, count, per_item)) if limiter else 0
+    final     = {}
+
+    with _chat_request(prompt, stream=True, max_tokens=max_tokens) as res:
+        if res.status != 200:
+            raise Exception(f"OpenAI API error {res.status}: {res.read().decode()}")
+
+        def on_usage(usage):
+            final['usage'] = usage
+            record_usage(prompt.template_id, usage)
+            if limiter is not None:
+                limiter.settle(estimated, usage)
+
+        deltas = _iter_sse_deltas(res, on_usage)
+        items  = 0
+        for q in iter_array(deltas):
+            if prompt.structured:
+                q = question_schema.validate_question(q)
+            if isinstance(q, dict):
+                items += 1
+                yield q
+
+    if budget is not None:
+        budget.record(question_type, topic, final.get('usage'), items)
+
+def save_questions(code, questions, meta=None):
+    storage.put_worksheet(code, questions, meta)
+
+def load_worksheet(code):
+    # (메타데이터, 문항 목록) 또는 None
+    return storage.get_worksheet(code)
+
+def _json_number(o):
+    # DynamoDB 에서 읽은 Decimal
+    return int(o) if o == int(o) else float(o)
+
+def _write_spooled(record):
+    save_questions(record['worksheet_code'], record['questions'], record.get('meta'))
+
+spool = (QueueSpool(PERSIST_MODE[len('sqs:'):], _write_spooled, default=_json_number)
+         if PERSIST_MODE.startswith('sqs:') else None)
+
+def persist(code, questions, meta=None):
+    # sqs 모드: 큐에 넣고 바로 돌아가며 저장은 큐 소비 호출에서. 넣지 못하면 바로 저장한다
+    if spool is not None:
+        try:
+            if spool.put({'worksheet_code': code, 'questions': questions, 'meta': meta}):
+                return
+        except Exception as e:
+            print("Spool enqueue failed, saving directly:", str(e))
+    save_questions(code, questions, meta)
+
+def _worksheet_meta(topic, question_type, usage=None):
+    meta  = {'topic': topic, 'type': question_type, 'model': MODEL, 'prompt_version': PROMPT_VERSION}
+    usage = {t: dict(u) for t, u in (usage or {}).items() if u.get('items')}
+    if usage:
+        meta['usage'] = usage   # 호출 유형별 -> 다음 max_tokens 예산의 표본
+    return meta
+
+def _headers(event):
+    return {k.lower(): v for k, v in (event.get('headers') or {}).items()}
+
+def parse_count(body):
+    # 1..MAX_COUNT 의 정수, 아니면 None
+    try:
+        count = int(body.get('count', 10))
+    except (TypeError, ValueError):
+        return None
+    return count if 1 <= count <= MAX_COUNT else None
+
+def _ndjson(obj):
+    return json.dumps(obj, ensure_ascii=False, default=_json_number) + '\n'
+
+def streaming_handler(body, code):
+    # NDJSON 한 줄씩: 첫 줄은 학습지 코드, 이후 문항이 완성되는 대로 보낸다 (stream_server.py 가 쓴다).
+    # 은행·로컬 계산 문항은 곧바로 보내고, 나머지 칸만 모델 스트림에서 받는다.
+    # 문항을 다 받기 전에 보내야 하므로 넉넉히 받아 골라 쓰기와 요청 묶기는 하지 않는다.
+    topic         = body['topic']
+    count         = parse_count(body)
+    question_type = body.get('type', '객관식')
+    grade         = body.get('grade', '3')
+    unit          = body.get('unit', '')
+
+    degraded  = False
+    questions = questions_from_bank(count, question_type, topic, grade, unit, code) if question_bank else None
+    if questions is None and breaker is not None and not breaker.allow():
+        questions = degraded_questions(count, question_type, topic, code)
+        if questions is None:
+            raise CircuitOpen("OpenAI circuit is open and no local fallback exists")
+        degraded = True
+    if questions is not None:
+        yield _ndjson({'worksheet_code': code, 'degraded': degraded})
+        for q in questions:
+            yield _ndjson(q)
+        persist(code, questions, _worksheet_meta(topic, question_type))
+        return
+
+    yield _ndjson({'worksheet_code': code, 'degraded': False})
+
+    placer    = _placer_for(count, question_type, code)
+    slots     = plan_slots(count, question_type)
+    questions = []
+    seen      = set()
+
+    def accept(q):
+        key = stem_key(q)
+        if not is_valid(q) or key in seen or len(questions) >= count:
+            return False
+        seen.add(key)
+        q['number'] = len(questions) + 1
+        questions.append(q)
+        return True
+
+    if LOCAL_CALC and calc_generator.supports(topic):
+        calc_types = [t for t, kind in slots if kind == 'calc']
+        for q, qtype in zip(calc_generator.generate(topic, len(calc_types), code), calc_types):
+            if qtype == "객관식":
+                placer.build(q)
+            q.pop('_calc', None)
+            if accept(q):
+                yield _ndjson(q)
+        slots = [s for s in slots if s[1] != 'calc']
+        words = len(slots)
+    else:
+        words = None   # 계산·문장제를 한 호출에 섞어 받는다
+
+    start = time.monotonic()
+    with collecting() as usage:
+        try:
+            # 중복·형식 오류로 빠진 문항은 한 번 더 받아 채운다
+            for _ in range(2):
+                missing = count - len(questions)
+                if missing <= 0:
+                    break
+                word_count = None if words is None else min(words, missing)
+                for q in stream_openai(missing, question_type, topic, word_count):
+                    # 다시 만들 틈이 없으므로 틀린 답 키는 그 자리에서 고친다
+                    if accept(placer.place(repair(q))):
+                        yield _ndjson(q)
+        except Exception:
+            if breaker is not None:
+                breaker.record(False, time.monotonic() - start)
+            raise
+    if breaker is not None:
+        breaker.record(True, time.monotonic() - start)
+
+    persist(code, questions, _worksheet_meta(topic, question_type, usage))
+
+def _method(event):
+    # REST API (v1) 와 HTTP API (v2) 이벤트 모두
+    return (event.get('httpMethod')
+            or event.get('requestContext', {}).get('http', {}).get('method', 'POST')).upper()
+
+def get_worksheet_handler(event):
+    params = {**(event.get('queryStringParameters') or {}), **(event.get('pathParameters') or {})}
+    code   = params.get('worksheet_code') or params.get('code')
+    if not code:
+        return {
+            'statusCode': 400,
+            'headers': {'Content-Type': 'application/json'},
+            'body': json.dumps({'error': 'worksheet_code is required'})
+        }
+
+    entry = worksheet_cache.get(code)
+    if entry is None:
+        loaded = load_worksheet(code)
+        if loaded is None:
+            return {
+                'statusCode': 404,
+                'headers': {'Content-Type': 'application/json'},
+                'body': json.dumps({'error': f'worksheet {code} not found'})
+            }
+        meta, questions = loaded
+        body  = json.dumps({
+            'worksheet_code': code,
+            'topic'         : meta.get('topic'),
+            'type'          : meta.get('type'),
+            'questions'     : questions,
+        }, default=_json_number)
+        entry = (worksheet_cache.put(code, body), body)
+
+    etag, body = entry
+    headers    = {'ETag': etag, 'Cache-Control': 'public, max-age=31536000, immutable'}
+    if etag_matches(_headers(event).get('if-none-match'), etag):
+        return {'statusCode': 304, 'headers': headers, 'body': ''}
+    return {
+        'statusCode': 200,
+        'headers': {'Content-Type': 'application/json', **headers},
+        'body': body
+    }
+
+def _is_warmup(event):
+    # 예약 규칙(EventBridge) 이나 {"warmup": true} 이벤트 / 본문
+    if event.get('warmup') or event.get('source') == 'aws.events':
+        return True
+    try:
+        return bool(json.loads(event.get('body') or '{}').get('warmup'))
+    except (ValueError, AttributeError):
+        return False
+
+def _compile_prompts():
+    n = 0
+    for topics in TOPICS.values():
+        for topic in topics:
+            for qtype in QUESTION_TYPES:
+                build_prompt(10, qtype, topic, structured=_structured())
+                n += 1
+    return n
+
+def warmup_handler(event):
+    # 콜드 스타트 비용을 첫 교사 요청 대신 여기서 치르고, 단계별 소요 시간을 돌려준다
+    steps = [
+        ('ssl_context', ssl_context),
+        ('openai_connection', lambda: [openai_pool.connect() for _ in range(int(event.get('connections', 1)))]),
+        ('storage', lambda: storage.get_worksheet('warmup')),
+        ('prompts', _compile_prompts),
+    ]
+    if question_bank is not None:
+        steps.append(('question_bank', lambda: question_bank.prime(iter_bank_keys())))
+    if spool is not None:
+        steps.append(('spool', lambda: spool.client))
+
+    timings, errors = {}, {}
+    for name, step in steps:
+        start = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            errors[name] = str(e)
+        timings[name] = round((time.perf_counter() - start) * 1000, 1)
+    print("Warm-up timings (ms):", json.dumps(timings))
+    return {
+        'statusCode': 200,
+        'headers': {'Content-Type': 'application/json'},
+        'body': json.dumps({'warmup': True, 'timings_ms': timings, 'errors': errors})
+    }
+
+def _remaining_budget(context, started):
+    # 응답까지 남은 시간(초): API Gateway 제한과 Lambda 제한 시간 중 먼저 오는 쪽
+    remaining = REQUEST_BUDGET - (time.monotonic() - started)
+    return max(0.0, min(remaining, context.get_remaining_time_in_millis() / 1000))
+
 def lambda_handler(event, context):
+    started = time.monotonic()
+    if spool is not None and QueueSpool.is_event(event):
+        return spool.handle(event)   # 스풀 큐 소비: 미뤄 둔 저장
+    if _is_warmup(event):
+        return warmup_handler(event)
+
+    def follower_wait():
+        # 같은 요청의 결과를 기다려도 되는 시간 — 나머지는 리더를 이어받을 때와 응답에 남긴다
+        return _remaining_budget(context, started) * FOLLOWER_SHARE
+
     try:
+        if _method(event) == 'GET':
+            return get_worksheet_handler(event)
+
         body          = json.loads(event.get('body', '{}'))
         topic         = body['topic']
-        count         = int(body.get('count', 10))
         question_type = body.get('type', '객관식')
+        grade         = body.get('grade', '3')
+        unit          = body.get('unit', '')
         code          = context.aws_request_id[:8]
+        count         = parse_count(body)
+        if count is None:
+            return {
+                'statusCode': 400,
+                'headers': {'Content-Type': 'application/json'},
+                'body': json.dumps({'error': f'count must be an integer between 1 and {MAX_COUNT}'})
+            }
+
+        def generate():
+            try:
+                with collecting() as usage:
+                    questions = generate_questions(count, question_type, topic, seed=code, grade=grade, unit=unit)
+                return {'questions': questions, 'degraded': False, 'usage': usage}
+            except Exception as e:
+                # 모델 장애(서킷 열림 포함) -> 은행이나 로컬 생성기로 대신 만든다
+                questions = degraded_questions(count, question_type, topic, code, grade, unit)
+                if questions is None:
+                    raise
+                print("Serving degraded worksheet:", str(e))
+                return {'questions': questions, 'degraded': True}
 
-        questions = call_openai(count, question_type, topic)
-
-        with table.batch_writer() as batch:
-            for q in questions:
-                if 'answerIndex' in q:
-                    answer_value = q['answerIndex'] + 1
-                else:
-                    answer_value = q.get('answer', '')
-
-                item = {
-                    'worksheet_code' : code,
-                    'question_number': q['number'],
-                    'question'       : q['stem'],
-                    'options'        : q.get('options', []),
-                    'answer'         : answer_value,
-                    'advice'         : q.get('advice', '')
-                }
-                batch.put_item(Item=item)
+        def respond():
+            result = coalescer.run(coalesce_key(topic, count, question_type), generate,
+                                   timeout=follower_wait())
+            persist(code, result['questions'], _worksheet_meta(topic, question_type, result.get('usage')))
 
+            return {
+                'statusCode': 200,
+                'headers': {'Content-Type': 'application/json'},
+                'body': json.dumps({'worksheet_code': code, 'questions': result['questions'],
+                                    'degraded': result['degraded']})
+            }
+
+        idem_key = _headers(event).get('idempotency-key')
+        if not idem_key:
+            return respond()
+        # 같은 키라도 요청 본문이 다르면 다른 요청으로 본다
+        fingerprint = hashlib.sha256((event.get('body') or '').encode()).hexdigest()[:16]
+        return idempotency.run(coalesce_key('idempotency', idem_key, fingerprint), respond,
+                               timeout=follower_wait())
+
+    except RateLimited as e:
         return {
-            'statusCode': 200,
-            'headers': {'Content-Type': 'application/json'},
-            'body': json.dumps({'worksheet_code': code, 'questions': questions})
+            'statusCode': 429,
+            'headers': {'Content-Type': 'application/json', 'Retry-After': str(int(e.retry_after) + 1)},
+            'body': json.dumps({'error': str(e)})
+        }
+    except StillRunning as e:
+        # 같은 요청을 다른 호출이 아직 만드는 중: 기다리다 직접 만들면 응답 제한을 넘긴다
+        return {
+            'statusCode': 503,
+            'headers': {'Content-Type': 'application/json', 'Retry-After': str(e.retry_after)},
+            'body': json.dumps({'error': str(e)})
+        }
+    except CircuitOpen as e:
+        # 대신 만들 수 없는 주제: 잠시 뒤 다시 시도하도록 알린다
+        return {
+            'statusCode': 503,
+            'headers': {'Content-Type': 'application/json', 'Retry-After': str(breaker.open_seconds)},
+            'body': json.dumps({'error': str(e)})
         }
-
     except Exception as e:
         print("Error in lambda_handler:", str(e))
         return {
@@ -1,16 +1,19 @@
 import os
 import json
-import boto3
-import openai
 
 # 환경 변수에서 설정값 가져오기
 TABLE_NAME      = os.getenv('DYNAMODB_TABLE')
 REGION          = os.getenv('AWS_REGION')
-openai.api_key  = os.getenv('OPENAI_API_KEY')
 
-# DynamoDB 테이블 객체
-dynamodb = boto3.resource('dynamodb', region_name=REGION)
-table    = dynamodb.Table(TABLE_NAME)
+# boto3 / openai 는 무거우므로 첫 요청에서 한 번만 불러온다
+_table = None
+
+def get_table():
+    global _table
+    if _table is None:
+        import boto3
+        _table = boto3.resource('dynamodb', region_name=REGION).Table(TABLE_NAME)
+    return _table
 
 def lambda_handler(event, context):
     # 요청 바디 파싱
@@ -27,6 +30,8 @@ def lambda_handler(event, context):
         f"on the topic '{topic}'. "
         "Return a JSON array of objects with keys: number, stem, options (list), answerIndex."
     )
+    import openai
+    openai.api_key = os.getenv('OPENAI_API_KEY')
     response = openai.ChatCompletion.create(
         model="gpt-3.5-turbo",
         messages=[
@@ -38,7 +43,7 @@ def lambda_handler(event, context):
     mcqs = json.loads(response.choices[0].message.content)
 
     # DynamoDB에 일괄 저장
-    with table.batch_writer() as batch:
+    with get_table().batch_writer() as batch:
         for q in mcqs:
             batch.put_item(Item={
                 'worksheet_code':  code,
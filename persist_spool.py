@@ -0,0 +1,55 @@
+import json
+
+# 응답을 먼저 보내고 저장은 나중에 하기 위한 스풀 (SQS 큐).
+# /tmp 에 남기면 응답 뒤 컨테이너가 얼거나 회수될 때 남은 저장이 함께 사라지므로,
+# 저장할 학습지를 큐에 넣고(SendMessage 한 번) 바로 응답한다.
+# 같은 함수를 큐의 이벤트 소스로 붙여 두면 handle() 이 따로 호출되어 실제 저장을 한다.
+#   aws lambda create-event-source-mapping --function-name worksheet-generator \
+#       --event-source-arn <queue arn> --function-response-types ReportBatchItemFailures
+# 실패한 메시지만 batchItemFailures 로 돌려주므로 그 메시지만 다시 들어오고,
+# 계속 실패하면 큐의 재처리 정책(maxReceiveCount)에 따라 DLQ 로 옮겨진다.
+# 최소 한 번(at-least-once) 저장되며, 저장은 (worksheet_code, question_number) 키로
+# 덮어쓰므로 여러 번 해도 같다.
+
+MAX_MESSAGE_BYTES = 256 * 1024   # SQS 메시지 한도
+
+class QueueSpool:
+    def __init__(self, queue_url, write, client=None, default=None):
+        # write(record) : 실제 저장 함수 (예외가 나면 메시지를 큐에 남겨 다시 시도)
+        # default       : json.dumps 가 모르는 값을 바꾸는 함수 (DynamoDB 의 Decimal 등)
+        self.queue_url = queue_url
+        self.write     = write
+        self.default   = default
+        self._client   = client
+
+    @property
+    def client(self):
+        # boto3 는 처음 쓸 때 import 한다 (핸들러 import 시간에 넣지 않는다)
+        if self._client is None:
+            import boto3
+            self._client = boto3.client('sqs')
+        return self._client
+
+    def put(self, record):
+        # 큐에 넣었으면 True, 메시지 한도를 넘으면 False (호출한 쪽이 바로 저장한다)
+        body = json.dumps(record, ensure_ascii=False, default=self.default)
+        if len(body.encode()) > MAX_MESSAGE_BYTES:
+            return False
+        self.client.send_message(QueueUrl=self.queue_url, MessageBody=body)
+        return True
+
+    @staticmethod
+    def is_event(event):
+        records = event.get('Records') or []
+        return bool(records) and all(r.get('eventSource') == 'aws:sqs' for r in records)
+
+    def handle(self, event):
+        # SQS 이벤트 소스 호출: 실패한 메시지만 다시 받도록 돌려준다
+        failures = []
+        for r in event['Records']:
+            try:
+                self.write(json.loads(r['body']))
+            except Exception as e:
+                print(f"Spool write failed for message {r.get('messageId')}:", str(e))
+                failures.append({'itemIdentifier': r['messageId']})
+        return {'batchItemFailures': failures}
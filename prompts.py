@@ -0,0 +1,238 @@
+import json
+import threading
+from collections import namedtuple
+
+import question_schema
+
+# 문항 생성 프롬프트 레지스트리와 chat completion 요청 본문.
+# 핸들러와 오프라인 배치 작업이 같은 프롬프트를 쓰도록 한곳에 둔다.
+#
+# 템플릿은 (유형, 계산/문장제 구성) 별로 버전을 붙여 등록한다.
+# 바뀌지 않는 지시문·예시·출력 형식은 모두 system 메시지 앞쪽에 두고,
+# 문항 수와 주제처럼 요청마다 달라지는 부분은 맨 끝 user 메시지에만 넣는다.
+# 그래야 OpenAI 의 프롬프트 캐시가 같은 접두부를 재사용할 수 있다
+# (캐시는 1024 토큰 이상의 같은 접두부부터 적용된다).
+# 캐시된 토큰 수(usage.prompt_tokens_details.cached_tokens)는 record_usage() 로 남긴다.
+# 출력 형식 문단만 응답 방식에 따라 다르다: 자유 형식은 JSON 배열, 구조화 출력(response_format)은
+# {"questions": [...]} 객체. 응답 방식은 배포 설정이므로 배포마다 접두부는 하나로 고정된다.
+
+MODEL          = "gpt-4o-mini"
+PROMPT_VERSION = "3"   # 레지스트리 전체 버전 (학습지 메타데이터에 기록)
+
+Prompt = namedtuple('Prompt', 'template_id messages structured')
+
+# 모든 템플릿이 공유하는 앞부분 — 문구를 바꾸면 캐시가 한 번 비워진다.
+# 유형·구성 규칙과 예시를 모두 여기에 두어 1024 토큰을 넘기고, 템플릿마다 다른 부분은
+# 뒤에 붙는 짧은 선택 문장(_TYPE_RULES, _KIND_RULES)뿐이다.
+_INSTRUCTIONS = (
+    "You are a helpful teacher who writes math questions in Korean for 3rd grade elementary school "
+    "students following the Korean national curriculum. Every question, option, answer and advice "
+    "must be written in natural, polite Korean (습니다/나요 style) that an eight-year-old can read.\n"
+    "\n"
+    "## Question types\n"
+    "The worksheet type is stated after these instructions. The three types are:\n"
+    "- 객관식 (multiple-choice): every question has exactly 4 distinct options. Write the options "
+    "as plain values without labels such as ①–⑤, 가/나/다/라 or A–D. Exactly one option is correct "
+    "and answerIndex is its 0-based position. The position of the correct option is reassigned later "
+    "for the whole worksheet, so do not try to balance it yourself.\n"
+    "- 단답형 (short-answer): no options. Put the exact expected answer in answer as a string, "
+    "including the unit when the question asks for one (e.g., \"375개\", \"2시간 15분\").\n"
+    "- 반반 (half and half): the first half of the questions are 객관식 and the rest are 단답형, "
+    "each following the rules above. With an odd count, make one more 객관식 question.\n"
+    "\n"
+    "## Calculation and word problems\n"
+    "Questions are either pure calculation or concise sentence-form word problems.\n"
+    "- A pure calculation question is a single expression, for example \"30 × 4 = ?\", "
+    "\"125 + 354를 구하세요.\", \"84 ÷ 4의 몫을 구하세요.\", \"3시간 20분 + 1시간 50분 = ?\", "
+    "\"2/5 ○ 3/5 (○ 안에 >, =, < 를 알맞게 쓰세요)\". Use only the numbers in the expression.\n"
+    "- A word problem is at most two short lines, describes one everyday situation (school, home, "
+    "market, playground, farm), uses a child's name, and needs exactly the operation of the topic.\n"
+    "- Unless told otherwise, make 80% of the questions pure calculation and 20% word problems. When "
+    "exact numbers of each kind are given after these instructions, follow those numbers exactly.\n"
+    "\n"
+    "## Topics of the 3rd grade curriculum\n"
+    "- 세 자리 수의 덧셈 / 뺄셈: three-digit numbers with up to two carries or borrows, "
+    "including zeros in the tens place (e.g., 405 - 178).\n"
+    "- 직각 삼각형 / 직사각형 / 정사각형: right angles, naming shapes, counting sides, vertices "
+    "and right angles, and perimeters with whole-centimeter sides.\n"
+    "- 두 자릿 수 ÷ 한 자릿 수: quotients up to two digits, with or without a remainder; the "
+    "remainder is always smaller than the divisor.\n"
+    "- (몇 십) × (몇) and (몇십몇) × (몇): products up to three digits, with or without carrying.\n"
+    "- 시간의 덧셈 / 뺄셈: hours and minutes (and seconds only when the topic says so), converting "
+    "60 minutes to 1 hour and borrowing 1 hour as 60 minutes.\n"
+    "- 분수 비교 / 소수 비교: fractions with the same denominator or unit fractions, and decimals "
+    "to one decimal place, compared with >, = or <.\n"
+    "\n"
+    "## Style examples (do not copy verbatim)\n"
+    "- 예서는 오전에 딸기를 232개, 오후에는 143개 땄습니다. 예서가 딴 딸기는 모두 몇 개 인가요?\n"
+    "- 오징어 20마리를 4개의 봉지에 똑같이 나누어 담으면 한 봉지에 몇 마리씩 담을 수 있나요?\n"
+    "- 채원이는 한 박스에 플라스틱병을 16개씩 담았습니다. 4박스를 가득 담았다면 총 몇 개인가요?\n"
+    "- 도서관에 책이 528권 있었습니다. 그중 175권을 빌려 갔다면 남은 책은 몇 권인가요?\n"
+    "- 민준이는 줄넘기를 어제 148번, 오늘 267번 했습니다. 이틀 동안 모두 몇 번 했나요?\n"
+    "- 색종이 56장을 8명이 똑같이 나누어 가지면 한 명이 몇 장씩 가지게 되나요?\n"
+    "- 한 상자에 귤이 30개씩 들어 있습니다. 6상자에 들어 있는 귤은 모두 몇 개인가요?\n"
+    "- 지호는 1시간 40분 동안 숙제를 하고 50분 동안 책을 읽었습니다. 모두 몇 시간 몇 분인가요?\n"
+    "- 영화가 2시간 10분 동안 상영되었습니다. 지금까지 1시간 35분을 보았다면 남은 시간은 얼마인가요?\n"
+    "- 우유를 서연이는 3/8 L, 하준이는 5/8 L 마셨습니다. 누가 더 많이 마셨나요?\n"
+    "- 끈의 길이가 0.7 m 와 0.4 m 입니다. 어느 끈이 더 긴가요?\n"
+    "- 네 변의 길이가 모두 같고 네 각이 모두 직각인 사각형의 이름은 무엇인가요?\n"
+    "- 한 변의 길이가 6 cm 인 정사각형의 네 변의 길이의 합은 몇 cm 인가요?\n"
+    "- 연필 45자루를 한 명에게 7자루씩 나누어 주면 몇 명에게 줄 수 있고 몇 자루가 남나요?\n"
+    "\n"
+    "## Answer formats\n"
+    "- Whole numbers: digits only, with the unit if asked (\"529\", \"529개\").\n"
+    "- Division with a remainder: \"몫 6, 나머지 3\". Without a remainder: the quotient only.\n"
+    "- Time: hours and minutes with carrying done, e.g. \"3시간 10분\", never \"2시간 70분\".\n"
+    "- Fractions: \"3/8\". Decimals: \"0.7\". Comparisons: one of \">\", \"=\", \"<\".\n"
+    "- Shapes: the Korean name, e.g. \"직각삼각형\", \"직사각형\", \"정사각형\".\n"
+    "\n"
+    "## Wrong options for 객관식\n"
+    "Wrong options must be plausible mistakes a 3rd grader makes, not random numbers: forgetting to "
+    "carry in addition, borrowing errors in subtraction, swapped digits, answers off by 10 or 100, "
+    "forgetting the remainder, not converting 60 minutes into an hour, or comparing only numerators "
+    "or only the digits after the decimal point. All four options must be different and use the same "
+    "format and unit as the correct answer.\n"
+    "\n"
+    "## Advice\n"
+    "Include a one-line advice for each question that helps the student solve it without giving the "
+    "answer away, e.g. \"일의 자리부터 차례로 더하고 받아올림을 잊지 마세요.\" or \"60분은 1시간으로 "
+    "바꾸어 보세요.\"\n"
+    "\n"
+    "## Quality checks before answering\n"
+    "- Each question must match the topic given at the end and the 3rd grade level of that unit.\n"
+    "- Do not repeat the same numbers, the same situation or the same sentence pattern.\n"
+    "- Keep every stem under 70 characters so it fits on one printed worksheet line.\n"
+    "- Solve every question yourself and make sure the answer key is correct.\n"
+    "\n"
+)
+
+# 응답 방식별 출력 형식 (False: 자유 형식 JSON 배열, True: response_format 스키마)
+_OUTPUT_FORMATS = {
+    False: (
+        "## Output format\n"
+        "Return only a JSON array (no prose, no markdown) of objects with keys: "
+        "number (int), stem (string), options (array of strings if any), "
+        "answerIndex (0-based) or answer (string), advice (string). Example:\n"
+        '[{"number": 1, "stem": "243 + 158 = ?", "options": ["391", "401", "301", "411"], '
+        '"answerIndex": 1, "advice": "일의 자리에서 받아올림을 해 보세요."}, '
+        '{"number": 2, "stem": "사탕이 125개 있었는데 48개를 먹었습니다. 남은 사탕은 몇 개인가요?", '
+        '"answer": "77개", "advice": "받아내림에 주의하여 빼 보세요."}]\n'
+    ),
+    True: (
+        "## Output format\n"
+        "Respond with the JSON object required by the response schema: one key questions whose value "
+        "is the list of question objects. Every object has all keys: number (int), stem (string), "
+        "options (4 strings for 객관식, an empty list for 단답형), answerIndex (0-based for 객관식, "
+        "null for 단답형), answer (string for 단답형, null for 객관식), advice (string). Example:\n"
+        '{"questions": [{"number": 1, "stem": "243 + 158 = ?", "options": ["391", "401", "301", "411"], '
+        '"answerIndex": 1, "answer": null, "advice": "일의 자리에서 받아올림을 해 보세요."}, '
+        '{"number": 2, "stem": "사탕이 125개 있었는데 48개를 먹었습니다. 남은 사탕은 몇 개인가요?", '
+        '"options": [], "answerIndex": null, "answer": "77개", "advice": "받아내림에 주의하여 빼 보세요."}]}\n'
+    ),
+}
+
+_SHARED_PREFIXES = {
+    structured: _INSTRUCTIONS + output + "\n## This worksheet\n"
+    for structured, output in _OUTPUT_FORMATS.items()
+}
+
+# 유형 선택 (정답 위치는 AnswerPlacer 가 학습지 단위로 다시 배정한다)
+_TYPE_RULES = {
+    "객관식": "Type: 객관식 — make all questions multiple-choice.\n",
+    "단답형": "Type: 단답형 — make all questions short-answer.\n",
+    "반반"  : "Type: 반반 — make half multiple-choice and half short-answer.\n",
+}
+
+# 계산 vs 문장제 구성
+_KIND_RULES = {
+    "mixed": "Kinds: 80% pure calculation, 20% word problems.\n",
+    "calc" : "Kinds: every question is pure calculation.\n",
+    "word" : "Kinds: every question is a word problem.\n",
+    "split": "Kinds: exactly the numbers of calculation questions and word problems given below.\n",
+}
+
+
+class PromptTemplate:
+    def __init__(self, question_type, kind, version, system, structured=False):
+        self.question_type = question_type
+        self.kind          = kind
+        self.version       = version
+        self.structured    = structured
+        self.id            = f"{question_type}/{kind}{'+schema' if structured else ''}@{version}"
+        self.system        = system
+
+    def render(self, count, topic, word_count=None):
+        user = f"Topic: '{topic}'\nNumber of questions: {count}"
+        if self.kind == "split":
+            user += f"\nPure calculation questions: {count - word_count}\nWord problems: {word_count}"
+        return Prompt(self.id, [
+            {"role": "system", "content": self.system},
+            {"role": "user",   "content": user},
+        ], self.structured)
+
+
+TEMPLATES = {}   # (유형, 구성, 구조화 출력 여부) -> 최신 PromptTemplate
+
+def register(template):
+    key     = (template.question_type, template.kind, template.structured)
+    current = TEMPLATES.get(key)
+    if current is None or int(template.version) >= int(current.version):
+        TEMPLATES[key] = template
+    return template
+
+for _structured, _prefix in _SHARED_PREFIXES.items():
+    for _qtype, _type_rule in _TYPE_RULES.items():
+        for _kind, _kind_rule in _KIND_RULES.items():
+            register(PromptTemplate(_qtype, _kind, PROMPT_VERSION, _prefix + _type_rule + _kind_rule, _structured))
+
+def prompt_kind(count, word_count=None):
+    if word_count is None:
+        return "mixed"
+    if word_count == 0:
+        return "calc"
+    if word_count >= count:
+        return "word"
+    return "split"
+
+def build_prompt(count, question_type, topic, word_count=None, structured=False):
+    # structured: response_format 스키마로 받을 요청이면 True (출력 형식 문단이 달라진다)
+    qtype    = question_type if question_type in _TYPE_RULES else "반반"
+    template = TEMPLATES[(qtype, prompt_kind(count, word_count), structured)]
+    return template.render(count, topic, word_count)
+
+def chat_body(prompt, max_tokens=None):
+    body = {
+        "model": MODEL,
+        "messages": prompt.messages,
+        "temperature": 0.7
+    }
+    if max_tokens:
+        body["max_tokens"] = max_tokens
+    if prompt.structured:
+        # 응답을 question_schema 의 JSON 스키마로 강제한다 ({"questions": [...]})
+        body["response_format"] = question_schema.response_format()
+    return body
+
+
+_usage      = {}   # template_id -> {'calls', 'prompt_tokens', 'cached_tokens', 'completion_tokens'}
+_usage_lock = threading.Lock()
+
+def record_usage(template_id, usage):
+    # 응답의 usage 를 템플릿별로 누적하고, 로그 한 줄로도 남긴다 (CloudWatch 에서 집계)
+    if not usage:
+        return
+    cached = (usage.get('prompt_tokens_details') or {}).get('cached_tokens', 0)
+    with _usage_lock:
+        total = _usage.setdefault(template_id, {'calls': 0, 'prompt_tokens': 0,
+                                                'cached_tokens': 0, 'completion_tokens': 0})
+        total['calls']             += 1
+        total['prompt_tokens']     += usage.get('prompt_tokens', 0)
+        total['cached_tokens']     += cached
+        total['completion_tokens'] += usage.get('completion_tokens', 0)
+    print(json.dumps({'prompt_usage': template_id, 'prompt_tokens': usage.get('prompt_tokens', 0),
+                      'cached_tokens': cached, 'completion_tokens': usage.get('completion_tokens', 0)},
+                     ensure_ascii=False))
+
+def usage_stats():
+    with _usage_lock:
+        return {k: dict(v) for k, v in _usage.items()}
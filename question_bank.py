@@ -0,0 +1,358 @@
+import json
+import uuid
+import random
+import threading
+
+from bulk_writer import BulkWriter, dynamodb_client, from_attributes
+
+# 미리 만들어 둔 문항을 (학년, 단원, 주제, 유형, 계산/문장제) 별로 보관하는 문제 은행.
+# 학습지는 은행에서 바로 꺼내 만들고, 남은 문항이 적으면 뒤에서 다시 채운다.
+# 문항마다 출제 횟수를 세어 자주 나간 문항은 은행에서 빼 돌려쓰기가 되게 한다.
+#
+# 저장소는 take / add / count 세 연산을 구현한다. *_many 는 여러 키를 한 번에 처리한다
+# (DynamoDB 는 학습지 하나를 몇 번의 왕복으로 꺼내도록 묶어 보낸다).
+# take 는 칸마다 꺼낸 문항 수(draws)도 세며, 웜업은 draws_many 로 많이 나가는 칸을 고른다.
+#   memory              : 컨테이너 메모리 (테스트·개발용)
+#   sqlite:<path>       : 로컬 SQLite 파일
+#   dynamodb:<table>    : 운영용 DynamoDB 테이블 (pk: bank_key, sk: entry_id)
+
+def bank_key(grade, unit, topic, question_type, kind):
+    return '|'.join(str(p) for p in (grade, unit, topic, question_type, kind))
+
+
+class MemoryBankStore:
+    def __init__(self):
+        self._entries = {}   # key -> {entry_id: [question, serves]}
+        self._draws   = {}   # key -> 꺼낸 문항 수
+        self._lock    = threading.Lock()
+
+    def add(self, key, questions):
+        with self._lock:
+            bucket = self._entries.setdefault(key, {})
+            for q in questions:
+                bucket[uuid.uuid4().hex] = [q, 0]
+
+    def add_many(self, entries):
+        for key, questions in entries:
+            self.add(key, questions)
+
+    def count(self, key):
+        with self._lock:
+            return len(self._entries.get(key, {}))
+
+    def take(self, key, n, max_serves):
+        with self._lock:
+            bucket = self._entries.get(key, {})
+            ids    = sorted(bucket, key=lambda i: (bucket[i][1], random.random()))[:n]
+            out    = []
+            for i in ids:
+                q, serves = bucket[i]
+                out.append(json.loads(json.dumps(q)))
+                if serves + 1 >= max_serves:
+                    del bucket[i]
+                else:
+                    bucket[i][1] = serves + 1
+            self._draws[key] = self._draws.get(key, 0) + len(out)
+            return out
+
+    def count_many(self, keys):
+        return [self.count(key) for key in keys]
+
+    def draws_many(self, keys):
+        with self._lock:
+            return [self._draws.get(key, 0) for key in keys]
+
+    def take_many(self, wants, max_serves):
+        return [self.take(key, n, max_serves) for key, n in wants]
+
+
+class SQLiteBankStore:
+    def __init__(self, path):
+        import sqlite3
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS question_bank ("
+            " bank_key TEXT NOT NULL, entry_id TEXT NOT NULL, question TEXT NOT NULL,"
+            " serves INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (bank_key, entry_id))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS question_bank_draws ("
+            " bank_key TEXT PRIMARY KEY, draws INTEGER NOT NULL)"
+        )
+
+    def add(self, key, questions):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO question_bank (bank_key, entry_id, question) VALUES (?, ?, ?)",
+                [(key, uuid.uuid4().hex, json.dumps(q, ensure_ascii=False)) for q in questions],
+            )
+
+    def add_many(self, entries):
+        for key, questions in entries:
+            self.add(key, questions)
+
+    def count(self, key):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM question_bank WHERE bank_key = ?", (key,)
+            ).fetchone()[0]
+
+    def take(self, key, n, max_serves):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            rows = self._conn.execute(
+                "SELECT entry_id, question FROM question_bank WHERE bank_key = ?"
+                " ORDER BY serves, random() LIMIT ?", (key, n)
+            ).fetchall()
+            ids = [(key, r[0]) for r in rows]
+            self._conn.executemany(
+                "UPDATE question_bank SET serves = serves + 1 WHERE bank_key = ? AND entry_id = ?", ids)
+            self._conn.execute(
+                "DELETE FROM question_bank WHERE bank_key = ? AND serves >= ?", (key, max_serves))
+            self._conn.execute(
+                "INSERT INTO question_bank_draws (bank_key, draws) VALUES (?, ?)"
+                " ON CONFLICT (bank_key) DO UPDATE SET draws = draws + excluded.draws", (key, len(rows)))
+            self._conn.execute("COMMIT")
+            return [json.loads(r[1]) for r in rows]
+
+    def count_many(self, keys):
+        return [self.count(key) for key in keys]
+
+    def draws_many(self, keys):
+        with self._lock:
+            draws = dict(self._conn.execute(
+                f"SELECT bank_key, draws FROM question_bank_draws WHERE bank_key IN ({','.join('?' * len(keys))})",
+                keys,
+            ).fetchall()) if keys else {}
+        return [draws.get(key, 0) for key in keys]
+
+    def take_many(self, wants, max_serves):
+        return [self.take(key, n, max_serves) for key, n in wants]
+
+
+class DynamoBankStore:
+    # 칸마다 entry_id '#count' 항목의 size 에 남은 문항 수, draws 에 꺼낸 문항 수를 둔다
+    # (여러 칸의 count 는 BatchGetItem 한 번).
+    # take 는 칸 하나를 Query 한 번으로 읽어 고르고, 출제 횟수는 BatchWriteItem 으로 되쓴다.
+    # 동시에 같은 칸에서 꺼내면 출제 횟수가 덜 세어질 수 있지만 돌려쓰기에는 충분하다.
+    COUNTER = '#count'
+
+    def __init__(self, table_name):
+        self.table_name = table_name
+        self._writer    = BulkWriter(table_name, key_names=('bank_key', 'entry_id'))
+
+    def _add_counts(self, key, size=0, draws=0):
+        # size 는 예약어라 이름을 따로 넘긴다. 0 은 보내지 않는다 (없던 size 를 0 으로 만들지 않게)
+        parts, names, values = [], {}, {}
+        if size:
+            parts.append('#s :s')
+            names['#s'], values[':s'] = 'size', {'N': str(size)}
+        if draws:
+            parts.append('draws :d')
+            values[':d'] = {'N': str(draws)}
+        if not parts:
+            return
+        kwargs = {
+            'TableName'                : self.table_name,
+            'Key'                      : {'bank_key': {'S': key}, 'entry_id': {'S': self.COUNTER}},
+            'UpdateExpression'         : 'ADD ' + ', '.join(parts),
+            'ExpressionAttributeValues': values,
+        }
+        if names:
+            kwargs['ExpressionAttributeNames'] = names
+        dynamodb_client().update_item(**kwargs)
+
+    def add(self, key, questions):
+        return self.add_many([(key, questions)])
+
+    def add_many(self, entries):
+        # 25개씩 나눈 BatchWriteItem 을 동시에 보낸다; 처리량·스로틀 통계를 돌려준다
+        stats = self._writer.write([
+            {
+                'bank_key': key,
+                'entry_id': uuid.uuid4().hex,
+                'question': json.dumps(q, ensure_ascii=False),
+                'serves'  : 0,
+            }
+            for key, questions in entries for q in questions
+        ])
+        if stats['failed']:
+            raise Exception(f"Question bank write left {stats['failed']} unprocessed items")
+        sizes = {}
+        for key, questions in entries:
+            sizes[key] = sizes.get(key, 0) + len(questions)
+        for key, n in sizes.items():
+            self._add_counts(key, size=n)
+        return stats
+
+    def _query(self, key, **kwargs):
+        items, kwargs = [], dict(kwargs, TableName=self.table_name,
+                                 KeyConditionExpression='bank_key = :k',
+                                 ExpressionAttributeValues={':k': {'S': key}})
+        while True:
+            res    = dynamodb_client().query(**kwargs)
+            items += [from_attributes(it) for it in res.get('Items', [])]
+            if 'LastEvaluatedKey' not in res:
+                return [it for it in items if it['entry_id'] != self.COUNTER]
+            kwargs['ExclusiveStartKey'] = res['LastEvaluatedKey']
+
+    def _init_size(self, key):
+        # 카운터가 없던 칸 (카운터 도입 전에 채운 칸): 한 번 세어 둔다
+        n = len(self._query(key, ProjectionExpression='entry_id'))
+        res = dynamodb_client().update_item(
+            TableName=self.table_name,
+            Key={'bank_key': {'S': key}, 'entry_id': {'S': self.COUNTER}},
+            UpdateExpression='SET #s = if_not_exists(#s, :n)',
+            ExpressionAttributeNames={'#s': 'size'},
+            ExpressionAttributeValues={':n': {'N': str(n)}},
+            ReturnValues='ALL_NEW',
+        )
+        return int(res['Attributes']['size']['N'])
+
+    def count(self, key):
+        return self.count_many([key])[0]
+
+    def _counters(self, keys):
+        # BatchGetItem 으로 카운터 항목을 100개씩 한 번에 읽는다 -> {key: {'size': n, 'draws': n}}
+        counters = {}
+        for i in range(0, len(keys), 100):
+            pending = {self.table_name: {
+                'Keys': [{'bank_key': {'S': k}, 'entry_id': {'S': self.COUNTER}}
+                         for k in dict.fromkeys(keys[i:i + 100])],
+                'ProjectionExpression': 'bank_key, #s, draws',
+                'ExpressionAttributeNames': {'#s': 'size'},
+            }}
+            while pending:
+                res = dynamodb_client().batch_get_item(RequestItems=pending)
+                for it in res.get('Responses', {}).get(self.table_name, []):
+                    counters[it['bank_key']['S']] = {
+                        name: int(it[name]['N']) for name in ('size', 'draws') if name in it}
+                pending = res.get('UnprocessedKeys') or None
+        return counters
+
+    def count_many(self, keys):
+        counters = self._counters(keys)
+        return [counters[k]['size'] if 'size' in counters.get(k, {}) else self._init_size(k) for k in keys]
+
+    def draws_many(self, keys):
+        counters = self._counters(keys)
+        return [counters.get(k, {}).get('draws', 0) for k in keys]
+
+    def take(self, key, n, max_serves):
+        items = self._query(key)
+        items.sort(key=lambda it: (int(it.get('serves', 0)), random.random()))
+        picked  = items[:n]
+        retired = [it for it in picked if int(it.get('serves', 0)) + 1 >= max_serves]
+        served  = [dict(it, serves=int(it.get('serves', 0)) + 1) for it in picked if it not in retired]
+        if served:
+            self._writer.write(served)
+        for it in retired:
+            dynamodb_client().delete_item(
+                TableName=self.table_name,
+                Key={'bank_key': {'S': key}, 'entry_id': {'S': it['entry_id']}},
+            )
+        self._add_counts(key, size=-len(retired), draws=len(picked))
+        return [json.loads(it['question']) for it in picked]
+
+    def take_many(self, wants, max_serves):
+        # 칸마다 Query 한 번 + 쓰기 한 번을 칸끼리 동시에 보낸다
+        if len(wants) == 1:
+            return [self.take(wants[0][0], wants[0][1], max_serves)]
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=len(wants)) as pool:
+            return list(pool.map(lambda w: self.take(w[0], w[1], max_serves), wants))
+
+
+def open_store(spec):
+    kind, _, arg = spec.partition(':')
+    if kind == 'memory':
+        return MemoryBankStore()
+    if kind == 'sqlite':
+        return SQLiteBankStore(arg or '/tmp/question_bank.db')
+    if kind == 'dynamodb':
+        return DynamoBankStore(arg)
+    raise ValueError(f"Unknown question bank store: {spec}")
+
+
+class QuestionBank:
+    def __init__(self, store, refill, low_water=20, target=60, max_serves=30, cache_size=20):
+        # refill(key_parts, n) -> [question, ...] : 은행을 채울 새 문항을 만든다
+        # cache_size : prime 이 칸마다 미리 꺼내 컨테이너에 둘 문항 수
+        self.store      = store
+        self.refill     = refill
+        self.low_water  = low_water
+        self.target     = target
+        self.max_serves = max_serves
+        self.cache_size = cache_size
+        self._cache     = {}      # key -> [question, ...] (이미 출제 횟수를 센 문항)
+        self._filling   = set()
+        self._lock      = threading.Lock()
+
+    def _take_cached(self, wants):
+        # 모든 칸이 미리 꺼내 둔 문항으로 채워지면 저장소에 가지 않는다
+        keys = [bank_key(*parts) for parts, _ in wants]
+        with self._lock:
+            if any(len(self._cache.get(k, ())) < n for k, (_, n) in zip(keys, wants)):
+                return None
+            batches = []
+            for k, (_, n) in zip(keys, wants):
+                batches.append(self._cache[k][:n])
+                self._cache[k] = self._cache[k][n:]
+            return batches
+
+    def draw(self, wants):
+        # wants: [(key_parts, n), ...] — 모든 칸을 채울 수 있을 때만 꺼내고 아니면 None.
+        # 저장소에서 꺼낼 때는 남은 양이 적은 칸을 어느 경우든 뒤에서 채운다.
+        batches = self._take_cached(wants)
+        if batches is not None:
+            return batches
+        lefts = self.store.count_many([bank_key(*parts) for parts, _ in wants])
+        for (parts, n), left in zip(wants, lefts):
+            if left - n < self.low_water:
+                self.top_up_async(parts)
+        if any(left < n for (_, n), left in zip(wants, lefts)):
+            return None
+        return self.store.take_many([(bank_key(*parts), n) for parts, n in wants], self.max_serves)
+
+    def top_up(self, parts):
+        key     = bank_key(*parts)
+        missing = self.target - self.store.count(key)
+        if missing > 0:
+            self.store.add(key, self.refill(parts, missing))
+
+    def top_up_async(self, parts):
+        # Lambda 는 응답 뒤 컨테이너를 얼리므로 채우기는 다음 호출 때 이어질 수 있다
+        key = bank_key(*parts)
+        with self._lock:
+            if key in self._filling:
+                return None
+            self._filling.add(key)
+
+        def run():
+            try:
+                self.top_up(parts)
+            except Exception as e:
+                print("Question bank refill failed:", str(e))
+            finally:
+                with self._lock:
+                    self._filling.discard(key)
+
+        t = threading.Thread(target=run, daemon=True)
+        t.start()
+        return t
+
+    def prime(self, keys, top=10):
+        # 웜업용: 지금까지 많이 꺼낸 칸 top 개의 문항을 미리 꺼내 컨테이너에 둔다.
+        # 채우기는 하지 않는다 (요청 경로의 draw 와 배치 작업이 맡는다).
+        keys    = [bank_key(*parts) for parts in keys]
+        ranked  = sorted(zip(self.store.draws_many(keys), keys), reverse=True)[:top]
+        popular = [k for draws, k in ranked if draws > 0]
+        with self._lock:
+            wants = [(k, self.cache_size - len(self._cache.get(k, ()))) for k in popular]
+        wants   = [(k, n) for k, n in wants if n > 0]
+        batches = self.store.take_many(wants, self.max_serves) if wants else []
+        with self._lock:
+            for (k, _), batch in zip(wants, batches):
+                self._cache.setdefault(k, []).extend(batch)
+            return {k: len(self._cache.get(k, ())) for k in popular}
@@ -0,0 +1,107 @@
+from functools import lru_cache
+
+# 구조화 출력(Structured Outputs) 모드용 문항 스키마.
+# 문항 형식을 pydantic 모델 하나로 정의해 두고,
+#   - OpenAI 요청에는 response_format (json_schema, strict) 으로 보내고
+#   - 응답은 캐시한 TypeAdapter 로 문항 하나씩 검증해 틀린 문항만 버린다.
+# 응답은 {"questions": [...]} 객체이므로 json_stream 이 안쪽 배열을 그대로 찾아 읽는다.
+# pydantic 은 처음 쓸 때 불러온다 (콜드 스타트에 넣지 않는다).
+
+SCHEMA_NAME = "worksheet_questions"
+
+# strict 모드가 받지 않는 키워드 — 검증은 로컬 pydantic 이 맡는다
+_UNSUPPORTED = ('default', 'minLength', 'maxLength', 'minItems', 'maxItems', 'minimum', 'maximum')
+
+@lru_cache(maxsize=None)
+def available():
+    # 순수 파이썬인 pydantic 만 있고 컴파일된 pydantic_core 가 런타임과 맞지 않으면
+    # 검증 때 처음 실패하므로, 확장 모듈과 TypeAdapter 까지 불러 봐야 한다
+    try:
+        import pydantic_core              # noqa: F401
+        from pydantic import TypeAdapter  # noqa: F401
+        return True
+    except ImportError as e:
+        print(f"pydantic is not usable ({e}); structured output is disabled")
+        return False
+
+@lru_cache(maxsize=None)
+def models():
+    from typing import List, Optional
+    from pydantic import BaseModel, ConfigDict, Field, model_validator
+
+    class Question(BaseModel):
+        model_config = ConfigDict(extra='ignore')
+
+        number     : int
+        stem       : str = Field(min_length=1)
+        options    : List[str] = Field(default_factory=list)   # 객관식 4개, 단답형은 빈 배열
+        answerIndex: Optional[int] = None                      # 객관식 정답 (0부터)
+        answer     : Optional[str] = None                      # 단답형 정답
+        advice     : str = ''
+
+        @model_validator(mode='after')
+        def _answer_matches_type(self):
+            if self.options:
+                if len(self.options) != 4 or len(set(self.options)) != 4:
+                    raise ValueError("multiple-choice questions need 4 distinct options")
+                if self.answerIndex is None or not 0 <= self.answerIndex < 4:
+                    raise ValueError("answerIndex must be 0-3")
+            elif not (self.answer or '').strip():
+                raise ValueError("short-answer questions need an answer")
+            return self
+
+    class QuestionSet(BaseModel):
+        questions: List[Question]
+
+    return Question, QuestionSet
+
+@lru_cache(maxsize=None)
+def question_adapter():
+    from pydantic import TypeAdapter
+    return TypeAdapter(models()[0])
+
+def _strict(schema):
+    # OpenAI strict 스키마: 모든 속성 required, additionalProperties false
+    if isinstance(schema, dict):
+        for key in _UNSUPPORTED:
+            schema.pop(key, None)
+        if schema.get('type') == 'object' and 'properties' in schema:
+            schema['required']             = list(schema['properties'])
+            schema['additionalProperties'] = False
+        for value in schema.values():
+            _strict(value)
+    elif isinstance(schema, list):
+        for value in schema:
+            _strict(value)
+    return schema
+
+@lru_cache(maxsize=None)
+def _schema():
+    return _strict(models()[1].model_json_schema())
+
+def response_format():
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": SCHEMA_NAME, "strict": True, "schema": _schema()},
+    }
+
+def validate_question(item):
+    # 검증을 통과한 문항 dict, 아니면 None
+    from pydantic import ValidationError
+    try:
+        q = question_adapter().validate_python(item)
+    except ValidationError:
+        return None
+    out = q.model_dump(exclude_none=True)
+    if q.options:
+        out.pop('answer', None)
+    else:
+        out.pop('options', None)
+        out.pop('answerIndex', None)
+    return out
+
+def validate_questions(items):
+    valid = [q for q in map(validate_question, items) if q is not None]
+    if len(valid) < len(items):
+        print(f"Structured output: dropped {len(items) - len(valid)} of {len(items)} invalid questions")
+    return valid
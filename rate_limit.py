@@ -0,0 +1,153 @@
+import time
+import random
+import threading
+
+from bulk_writer import dynamodb_client, to_attributes
+
+# OpenAI RPM / TPM 한도에 맞춘 호출 전 속도 제한.
+# 요청마다 토큰 수를 (프롬프트 길이 + 문항 수 × 문항당 평균 토큰) 으로 어림해 버킷에서 빼고,
+# 모자라면 잠시 기다렸다가(큐) 다시 시도하거나, 오래 기다려야 하면 바로 RateLimited 로 돌려보낸다(shed).
+# 응답의 실제 usage 와 어림값의 차이는 settle() 로 버킷에 반영한다.
+#
+#   local                 : 컨테이너마다 따로 두는 토큰 버킷 (한도를 컨테이너 수로 나눠 설정)
+#   dynamodb:<table>      : 컨테이너들이 나눠 쓰는 분 단위 원자 카운터 (임대 테이블 재사용 가능,
+#                           파티션 키 lease_key (S), TTL 속성 ttl)
+
+CHARS_PER_TOKEN = 2     # 한글·영문이 섞인 프롬프트 기준 보수적 어림
+TOKENS_PER_ITEM = 150   # 문항 하나의 출력 토큰 어림 (advice 포함)
+
+class RateLimited(Exception):
+    def __init__(self, retry_after):
+        super().__init__(f"OpenAI rate limit reached, retry after {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+def estimate_tokens(messages, count, per_item=TOKENS_PER_ITEM):
+    prompt = sum(len(m.get('content') or '') for m in messages) // CHARS_PER_TOKEN
+    return prompt + count * per_item
+
+
+class LocalTokenBucket:
+    def __init__(self, rpm, tpm):
+        self.capacity = {'requests': rpm, 'tokens': tpm}
+        self._level   = dict(self.capacity)
+        self._updated = time.monotonic()
+        self._lock    = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        for k, cap in self.capacity.items():
+            self._level[k] = min(cap, self._level[k] + cap * elapsed / 60)
+        self._updated = now
+
+    def try_acquire(self, tokens):
+        # 0 이면 확보, 아니면 다시 시도하기까지 기다릴 초
+        need = {'requests': 1, 'tokens': min(tokens, self.capacity['tokens'])}
+        with self._lock:
+            self._refill(time.monotonic())
+            short = {k: need[k] - self._level[k] for k in need if self._level[k] < need[k]}
+            if not short:
+                for k in need:
+                    self._level[k] -= need[k]
+                return 0
+            return max(amount * 60 / self.capacity[k] for k, amount in short.items())
+
+    def settle(self, delta):
+        with self._lock:
+            self._level['tokens'] -= delta
+
+
+class DynamoTokenBucket:
+    def __init__(self, table_name, rpm, tpm, name='openai'):
+        self.table_name = table_name
+        self.rpm        = rpm
+        self.tpm        = tpm
+        self.name       = name
+
+    def _key(self, window):
+        return {'lease_key': {'S': f"ratelimit|{self.name}|{window}"}}
+
+    def try_acquire(self, tokens):
+        from botocore.exceptions import ClientError
+        now    = time.time()
+        window = int(now // 60)
+        tokens = min(tokens, self.tpm)
+        try:
+            dynamodb_client().update_item(
+                TableName=self.table_name,
+                Key=self._key(window),
+                UpdateExpression='ADD #r :one, #k :tokens SET #t = :exp',
+                ConditionExpression='attribute_not_exists(#r) OR (#r < :rmax AND #k <= :tmax)',
+                ExpressionAttributeNames={'#r': 'requests', '#k': 'tokens', '#t': 'ttl'},
+                ExpressionAttributeValues=to_attributes({
+                    ':one'   : 1,
+                    ':tokens': tokens,
+                    ':rmax'  : self.rpm,
+                    ':tmax'  : self.tpm - tokens,
+                    ':exp'   : (window + 2) * 60,
+                }),
+            )
+            return 0
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                return (window + 1) * 60 - now   # 이번 분의 한도를 다 씀
+            raise
+
+    def settle(self, delta):
+        if not delta:
+            return
+        window = int(time.time() // 60)
+        dynamodb_client().update_item(
+            TableName=self.table_name,
+            Key=self._key(window),
+            UpdateExpression='ADD #k :delta SET #t = if_not_exists(#t, :exp)',
+            ExpressionAttributeNames={'#k': 'tokens', '#t': 'ttl'},
+            ExpressionAttributeValues=to_attributes({':delta': delta, ':exp': (window + 2) * 60}),
+        )
+
+
+class RateLimiter:
+    def __init__(self, bucket, max_wait=5.0):
+        self.bucket   = bucket
+        self.max_wait = max_wait   # 이보다 오래 기다려야 하면 기다리지 않고 돌려보낸다
+        self.stats    = {'acquired': 0, 'waited': 0, 'shed': 0}
+        self._lock    = threading.Lock()
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def acquire(self, tokens):
+        deadline = time.monotonic() + self.max_wait
+        waited   = False
+        while True:
+            wait = self.bucket.try_acquire(tokens)
+            if wait <= 0:
+                self._count('acquired')
+                if waited:
+                    self._count('waited')
+                return tokens
+            if time.monotonic() + wait > deadline:
+                self._count('shed')
+                raise RateLimited(wait)
+            # 한꺼번에 깨어나 다시 몰리지 않도록 조금씩 흩어 기다린다
+            time.sleep(wait * random.uniform(1.0, 1.25))
+            waited = True
+
+    def settle(self, estimated, usage):
+        # 실제 usage 와 어림값의 차이만큼 버킷을 고친다
+        if not usage:
+            return
+        actual = usage.get('prompt_tokens', 0) + usage.get('completion_tokens', 0)
+        try:
+            self.bucket.settle(actual - estimated)
+        except Exception as e:
+            print("Rate limit settle failed:", str(e))
+
+
+def open_limiter(spec, rpm, tpm, max_wait=5.0):
+    kind, _, arg = spec.partition(':')
+    if kind == 'local':
+        return RateLimiter(LocalTokenBucket(rpm, tpm), max_wait)
+    if kind == 'dynamodb':
+        return RateLimiter(DynamoTokenBucket(arg, rpm, tpm), max_wait)
+    raise ValueError(f"Unknown rate limiter: {spec}")
@@ -0,0 +1,3 @@
+#!/bin/sh
+# Lambda Web Adapter 가 띄우는 스트리밍 함수의 시작 스크립트 (stream_server.py 참고)
+exec python3 stream_server.py
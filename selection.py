@@ -0,0 +1,121 @@
+import re
+from difflib import SequenceMatcher
+
+from verify import check
+
+# 넉넉히 만든 문항 중 좋은 것만 고르는 선택 단계.
+# 모델에 count + k 문항을 요청한 뒤 문항마다 로컬에서 점수를 매기고 상위 count 개를 쓴다.
+#   - 형식: 줄기·선지·정답 키가 온전한가 (아니면 제외)
+#   - 정답 검증: verify.check 결과 (ok > repaired > unverified > failed)
+#   - 줄기 길이: 70자를 넘으면 화면에서 글자가 줄어든다
+#   - 주제 관련성: 주제에 맞는 표현(기호·낱말)이 들어 있는가
+#   - 중복: 이미 고른 문항과 거의 같은 줄기는 점수를 깎는다 (고를 때마다 다시 계산)
+# 문장제는 정답을 검증할 수 없어 계산 문항보다 늘 점수가 낮으므로, 점수는 같은 칸
+# (유형, 계산/문장제) 안에서만 견주고 칸마다 정해진 문항 수를 채운다.
+
+MAX_STEM_CHARS    = 70
+NEAR_DUPLICATE    = 0.9   # SequenceMatcher 비율이 이 이상이면 거의 같은 문항
+DUPLICATE_PENALTY = 2
+
+_CHECK_SCORES = {'ok': 2, 'repaired': 1, 'unverified': 0, 'failed': -3}
+
+# 주제에 들어 있는 낱말 -> 문항에 나올 만한 표현
+_TOPIC_HINTS = {
+    '덧셈'  : ('+', '더하', '더한', '합', '모두'),
+    '뺄셈'  : ('-', '빼', '뺀', '차', '남은', '남았'),
+    '×'     : ('×', 'x', '곱', '배', '씩'),
+    '÷'     : ('÷', '나누', '나눈', '몫', '나머지', '씩'),
+    '시간'  : ('시간', '분'),
+    '분수'  : ('/', '분의', '분수'),
+    '소수'  : ('.', '소수'),
+    '비교'  : ('>', '<', '큰', '작은'),
+    '삼각형': ('삼각형',),
+    '직사각형': ('직사각형',),
+    '정사각형': ('정사각형',),
+}
+
+def topic_keywords(topic):
+    keywords = set()
+    for word, hints in _TOPIC_HINTS.items():
+        if word in topic:
+            keywords.update(hints)
+    if not keywords:
+        keywords.update(re.findall(r'[가-힣]{2,}', topic))
+    return keywords
+
+def is_valid(q):
+    if not isinstance(q, dict) or not isinstance(q.get('stem'), str) or not q['stem'].strip():
+        return False
+    options = q.get('options')
+    if options:
+        idx = q.get('answerIndex')
+        return (len(options) == 4 and all(isinstance(o, str) for o in options)
+                and isinstance(idx, int) and 0 <= idx < 4)
+    return 'answer' in q
+
+def score(q, keywords=()):
+    # 점수, 형식이 틀리면 None. check() 는 고칠 수 있는 정답 키를 그 자리에서 고친다.
+    if not is_valid(q):
+        return None
+    s    = _CHECK_SCORES[check(q)]
+    stem = q['stem']
+    if len(stem) > MAX_STEM_CHARS:
+        s -= 1 + (len(stem) - MAX_STEM_CHARS) / 20
+    text = stem + ' '.join(q.get('options') or [])
+    if keywords and not any(k in text for k in keywords):
+        s -= 1
+    return s
+
+def _normalize(stem):
+    return re.sub(r'\s+', ' ', stem).strip()
+
+def _near_duplicate(stem, picked):
+    for other in picked:
+        m = SequenceMatcher(None, stem, other)
+        if m.real_quick_ratio() >= NEAR_DUPLICATE and m.ratio() >= NEAR_DUPLICATE:
+            return True
+    return False
+
+def select_questions(items, count, topic, wants=None):
+    # 상위 count 개 (원래 순서 유지).
+    # wants = {칸: 문항 수} 이면 q['_slot'] 이 같은 문항끼리만 견줘 칸마다 먼저 채우고,
+    # 모자란 만큼은 남은 문항 중 점수가 높은 것으로 채운다. '_slot' 은 돌려주기 전에 지운다.
+    keywords   = topic_keywords(topic)
+    candidates = []
+    for i, q in enumerate(items):
+        s = score(q, keywords)
+        if s is not None:
+            candidates.append((s, i, q, _normalize(q['stem'])))
+
+    picked = {}          # index -> question
+    stems  = []
+
+    def adjusted(c):
+        s, i, _, stem = c
+        if _near_duplicate(stem, stems):
+            s -= DUPLICATE_PENALTY
+        return s, -i
+
+    def pick(pool, n):
+        # 이미 고른 문항에 따라 중복 점수가 바뀌므로 한 문항씩 고른다
+        while pool and n > 0:
+            best = max(pool, key=adjusted)
+            pool.remove(best)
+            candidates.remove(best)
+            _, i, q, stem = best
+            if stem in stems:
+                continue
+            picked[i] = q
+            stems.append(stem)
+            n -= 1
+
+    for slot, n in (wants or {}).items():
+        pick([c for c in candidates if c[2].get('_slot') == slot], n)
+    pick(list(candidates), count - len(picked))
+
+    if len(picked) < len(items):
+        print(f"Selected {len(picked)} of {len(items)} generated questions")
+    for q in items:
+        if isinstance(q, dict):
+            q.pop('_slot', None)
+    return [picked[i] for i in sorted(picked)]
@@ -0,0 +1,86 @@
+import re
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+# 한 학습지를 여러 개의 작은 생성 호출(샤드)로 나눠 동시에 요청한다.
+# 출력 토큰은 순서대로 생성되므로 문항 수가 줄면 호출당 지연도 줄어든다.
+
+WORD_PROBLEM_RATIO = 0.2
+
+def apportion(total, weights):
+    # 최대 나머지 방식: 합계가 정확히 total 이 되도록 비례 배분
+    whole = sum(weights)
+    if not whole:
+        return [0] * len(weights)
+    raw   = [total * w / whole for w in weights]
+    parts = [int(r) for r in raw]
+    order = sorted(range(len(raw)), key=lambda i: raw[i] - parts[i], reverse=True)
+    for i in order[:total - sum(parts)]:
+        parts[i] += 1
+    return parts
+
+def plan_slots(count, question_type):
+    # 문항별 (유형, 'calc' | 'word') — 문장제 20% 는 유형별 문항 수에 비례해 나눈다
+    if question_type == "반반":
+        groups = [("객관식", (count + 1) // 2), ("단답형", count // 2)]
+    else:
+        groups = [(question_type, count)]
+
+    words = apportion(round(count * WORD_PROBLEM_RATIO), [n for _, n in groups])
+    slots = []
+    for (qtype, n), w in zip(groups, words):
+        slots += [(qtype, 'word')] * w + [(qtype, 'calc')] * (n - w)
+    return slots
+
+def plan_shards(slots, shard_size=0, by_kind=False):
+    # [(문항 수, 유형, 문장제 수), ...] — 샤드마다 유형은 하나로 고정.
+    # by_kind 이면 계산·문장제도 샤드를 나눠, 어느 문항이 어느 칸인지 샤드로 알 수 있게 한다.
+    key    = (lambda s: s) if by_kind else (lambda s: s[0])
+    shards = []
+    for group in dict.fromkeys(map(key, slots)):
+        members = [s for s in slots if key(s) == group]
+        qtype   = members[0][0]
+        kinds   = [k for _, k in members]
+        k       = -(-len(kinds) // shard_size) if shard_size else 1
+        sizes   = apportion(len(kinds), [1] * k)
+        words   = apportion(kinds.count('word'), sizes)
+        shards += [(size, qtype, w) for size, w in zip(sizes, words)]
+    return shards
+
+def stem_key(q):
+    return re.sub(r'\s+', '', str(q.get('stem', ''))).lower()
+
+def merge_questions(batches, count):
+    # 중복 문항 제거 후 1번부터 다시 번호를 매긴다
+    seen, merged = set(), []
+    for batch in batches:
+        for q in batch:
+            key = stem_key(q)
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            merged.append(q)
+    merged = merged[:count]
+    for i, q in enumerate(merged, 1):
+        q['number'] = i
+    return merged
+
+def generate_sharded(generate, shards, topic):
+    # generate(count, question_type, topic, word_count) -> [question, ...]
+    # 결과는 shards 와 같은 순서이고, 실패한 샤드는 빈 목록이다
+    if len(shards) == 1:
+        n, qtype, w = shards[0]
+        return [generate(n, qtype, topic, w)]
+
+    batches = []
+    with ThreadPoolExecutor(max_workers=len(shards)) as pool:
+        # 호출한 쪽의 컨텍스트(토큰 사용량 집계 등)를 샤드 스레드로 넘긴다
+        futures = [pool.submit(contextvars.copy_context().run, generate, n, qtype, topic, w)
+                   for n, qtype, w in shards]
+        for f in futures:
+            try:
+                batches.append(f.result())
+            except Exception as e:
+                print("Shard generation failed:", str(e))
+                batches.append([])
+    return batches
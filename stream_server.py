@@ -0,0 +1,102 @@
+import os
+import json
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import lambda_function
+from circuit_breaker import CircuitOpen
+from rate_limit import RateLimited
+
+# 응답 스트리밍용 HTTP 서버.
+# Python Lambda 런타임은 응답을 나눠 보낼 수 없으므로, 스트리밍 함수에서는 Lambda Web Adapter
+# 레이어가 이 서버를 띄우고 함수 URL(InvokeMode RESPONSE_STREAM)로 들어온 요청을 넘겨준다.
+# 문항은 lambda_function.streaming_handler 가 만드는 대로 NDJSON 한 줄씩 chunked 로 흘려보낸다.
+#
+# 스트리밍 함수 설정 (배포 zip 은 일반 함수와 같다):
+#   핸들러 run.sh, 레이어 LambdaAdapterLayerX86 (또는 Arm64)
+#   AWS_LAMBDA_EXEC_WRAPPER=/opt/bootstrap, AWS_LWA_INVOKE_MODE=response_stream, PORT=8080
+#   함수 URL InvokeMode=RESPONSE_STREAM
+#
+#   POST /  {"topic": ..., "count": 10, "type": "객관식"}
+#   -> {"worksheet_code": ..., "degraded": false}\n {문항}\n {문항}\n ...
+#   생성 중에 실패하면 마지막 줄이 {"error": ...} 이다 (상태 코드는 이미 200 으로 나갔다).
+
+PORT = int(os.getenv('PORT', '8080'))
+
+def _request_code(headers):
+    # Lambda Web Adapter 가 넘겨주는 호출 컨텍스트의 요청 ID (없으면 새로 만든다)
+    try:
+        context = json.loads(headers.get('x-amzn-lambda-context') or '{}')
+    except ValueError:
+        context = {}
+    return (context.get('request_id') or uuid.uuid4().hex)[:8]
+
+
+class StreamHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def _send_json(self, status, body, headers=None):
+        data = json.dumps(body, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _chunk(self, text):
+        data = text.encode()
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        # Lambda Web Adapter 준비 확인
+        self._send_json(200, {'ok': True})
+
+    def do_POST(self):
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)) or b'{}')
+        except ValueError:
+            return self._send_json(400, {'error': 'request body must be JSON'})
+        if not isinstance(body, dict) or not body.get('topic'):
+            return self._send_json(400, {'error': 'topic is required'})
+        if lambda_function.parse_count(body) is None:
+            return self._send_json(400, {'error': f'count must be an integer between 1 and {lambda_function.MAX_COUNT}'})
+
+        lines = lambda_function.streaming_handler(body, _request_code(self.headers))
+        try:
+            first = next(lines)
+        except CircuitOpen as e:
+            return self._send_json(503, {'error': str(e)},
+                                   {'Retry-After': str(lambda_function.breaker.open_seconds)})
+        except Exception as e:
+            print("Error in streaming_handler:", str(e))
+            return self._send_json(500, {'error': str(e)})
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Cache-Control', 'no-store')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        self._chunk(first)
+        try:
+            for line in lines:
+                self._chunk(line)
+        except Exception as e:
+            print("Error in streaming_handler:", str(e))
+            error = {'error': str(e)}
+            if isinstance(e, RateLimited):
+                error['retry_after'] = int(e.retry_after) + 1
+            self._chunk(json.dumps(error, ensure_ascii=False) + '\n')
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+def serve(port=PORT):
+    server = ThreadingHTTPServer(('0.0.0.0', port), StreamHandler)
+    server.daemon_threads = True
+    return server
+
+if __name__ == '__main__':
+    serve().serve_forever()
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# 모듈이 저장소 최상위에 있으므로 테스트에서 바로 import 할 수 있게 한다
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# lambda_function 은 import 할 때 저장소를 연다 — 테스트는 컨테이너 메모리 저장소로
+os.environ.setdefault('WORKSHEET_STORE', 'memory')
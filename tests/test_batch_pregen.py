@@ -0,0 +1,46 @@
+import re
+import json
+
+import batch_pregen
+from batch_pregen import LocalBatchClient
+from curriculum import iter_bank_keys
+from question_bank import SQLiteBankStore, bank_key
+
+def _respond(body):
+    # 요청한 문항 수만큼 만들고, 형식이 틀린 문항 하나를 섞는다
+    user = body['messages'][-1]['content']
+    n    = int(re.search(r'Number of questions: (\d+)', user).group(1))
+    mc   = 'multiple-choice' in body['messages'][0]['content']
+    items = []
+    for i in range(n):
+        q = {'number': i + 1, 'stem': f'지우는 구슬을 {10 + i}개 가지고 있습니다. 모두 몇 개인가요?',
+             'advice': '더해 보세요.'}
+        if mc:
+            q.update(options=['1', '2', '3', '4'], answerIndex=1)
+        else:
+            q['answer'] = '3'
+        items.append(q)
+    items.append({'number': n + 1, 'options': ['1']})
+    return '```json\n' + json.dumps(items, ensure_ascii=False) + '\n```'
+
+def test_batch_round_trip_fills_every_key(tmp_path):
+    store    = SQLiteBankStore(str(tmp_path / 'bank.db'))
+    requests = batch_pregen.build_requests(3)
+    stats    = batch_pregen.run(LocalBatchClient(_respond), store, per_key=3, interval=0)
+
+    assert stats['lines'] == len(requests)
+    assert stats['failed'] == 0
+    assert stats['questions'] == 3 * len(requests)
+    for parts in iter_bank_keys():
+        assert store.count(bank_key(*parts)) == 3, parts
+
+    q = store.take(bank_key('3', '1단원', '세 자리 수의 덧셈', '객관식', 'word'), 1, 30)[0]
+    assert 'number' not in q and len(q['options']) == 4
+
+def test_failed_result_lines_are_counted_not_ingested(tmp_path):
+    store  = SQLiteBankStore(str(tmp_path / 'bank.db'))
+    client = LocalBatchClient(lambda body: 'no questions today')
+    stats  = batch_pregen.run(client, store, per_key=2, interval=0)
+
+    assert stats['questions'] == 0
+    assert stats['failed'] == stats['lines'] > 0
@@ -0,0 +1,58 @@
+import json
+import threading
+
+import pytest
+
+import lambda_function
+from coalesce import Coalescer, StillRunning, coalesce_key
+
+
+class Context:
+    aws_request_id = 'req-0001-follower'
+
+    def __init__(self, remaining_ms):
+        self.remaining_ms = remaining_ms
+
+    def get_remaining_time_in_millis(self):
+        return self.remaining_ms
+
+
+def _lead(coalescer, key, release):
+    started = threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return {'questions': [], 'degraded': False}
+
+    t = threading.Thread(target=coalescer.run, args=(key, slow), daemon=True)
+    t.start()
+    assert started.wait(5)
+    return t
+
+
+def test_follower_gives_up_instead_of_generating():
+    coalescer, release, calls = Coalescer(), threading.Event(), []
+    leader = _lead(coalescer, 'k', release)
+    try:
+        with pytest.raises(StillRunning) as e:
+            coalescer.run('k', lambda: calls.append(1), timeout=0.05)
+        assert calls == []
+        assert 1 <= e.value.retry_after <= 10
+    finally:
+        release.set()
+        leader.join(5)
+
+
+def test_handler_answers_503_when_the_budget_runs_out():
+    release = threading.Event()
+    body    = {'topic': '도형의 둘레', 'count': 10, 'type': '객관식'}
+    leader  = _lead(lambda_function.coalescer, coalesce_key(body['topic'], 10, '객관식'), release)
+    try:
+        res = lambda_function.lambda_handler({'httpMethod': 'POST', 'body': json.dumps(body)}, Context(100))
+        assert res['statusCode'] == 503
+        assert int(res['headers']['Retry-After']) >= 1
+        assert 'still being generated' in json.loads(res['body'])['error']
+    finally:
+        release.set()
+        leader.join(5)
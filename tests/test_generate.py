@@ -0,0 +1,33 @@
+import itertools
+
+import lambda_function
+from verify import check
+
+
+def _fake_model(calls):
+    seq = itertools.count(1)
+
+    def call_openai(count, question_type, topic, word_count=None, remainder=False):
+        calls.append((count, question_type, word_count))
+        out = []
+        for _ in range(count):
+            n = next(seq)
+            out.append({'stem': f'피자 {n}판을 똑같이 나누었습니다. 더 많이 먹은 사람은 누구인가요?',
+                        'options': ['민수', '지우', '서연', '하준'], 'answerIndex': 0})
+        return out
+    return call_openai
+
+
+def test_fraction_compare_sheet_needs_no_extra_model_call(monkeypatch):
+    # 로컬 비교 문항 8개가 모두 살아남아야 문장제 칸 호출 외에 섞어 받는 호출이 없다
+    for code in ('a1', 'b2', 'c3', 'd4', 'e5'):
+        calls = []
+        monkeypatch.setattr(lambda_function, 'call_openai', _fake_model(calls))
+        questions = lambda_function.generate_questions(10, '객관식', '분수 비교', seed=code)
+
+        assert len(questions) == 10
+        assert all(w for _, _, w in calls), calls   # word_count 없는 호출 = 섞어 받는 보충 호출
+        local = [q for q in questions if '가장 큰 수' in q['stem']]
+        assert len(local) == 8
+        assert len({q['stem'] for q in local}) == 8
+        assert all(check(q) == 'ok' for q in local)
@@ -0,0 +1,36 @@
+import os
+import sys
+import subprocess
+
+# 핸들러 모듈 import 시간 예산. 콜드 스타트마다 첫 요청보다 먼저 치르는 비용이므로
+# boto3·openai·pydantic 같은 무거운 모듈은 처음 쓸 때 import 해야 한다.
+ROOT             = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_BUDGET_MS = float(os.getenv('IMPORT_BUDGET_MS', '250'))
+DEFERRED         = ('boto3', 'botocore', 'openai', 'pydantic', 'pydantic_core', 'httpx', 'anyio',
+                    'sqlite3', 'ssl', 'http.client')
+
+def _importtime(module):
+    # python -X importtime 의 stderr -> {모듈: 누적 시간(us)}
+    env = {k: v for k, v in os.environ.items() if not k.startswith(('WORKSHEET_', 'QUESTION_', 'RATE_'))}
+    env.update(OPENAI_API_KEY='test', DYNAMODB_TABLE='worksheets')
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+def test_handler_import_stays_within_budget():
+    times = _importtime('lambda_function')
+    total = times['lambda_function'] / 1000
+    assert total <= IMPORT_BUDGET_MS, f"lambda_function import took {total:.1f} ms (budget {IMPORT_BUDGET_MS} ms)"
+
+def test_heavy_modules_are_deferred():
+    loaded = set(_importtime('lambda_function'))
+    assert not loaded & set(DEFERRED), sorted(loaded & set(DEFERRED))
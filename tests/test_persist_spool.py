@@ -0,0 +1,46 @@
+from decimal import Decimal
+
+from persist_spool import MAX_MESSAGE_BYTES, QueueSpool
+
+
+class FakeSQS:
+    def __init__(self):
+        self.sent = []
+
+    def send_message(self, QueueUrl, MessageBody):
+        self.sent.append(MessageBody)
+
+
+def _event(bodies):
+    return {'Records': [{'eventSource': 'aws:sqs', 'messageId': f'm{i}', 'body': b}
+                        for i, b in enumerate(bodies)]}
+
+
+def test_enqueued_record_is_written_by_the_queue_consumer():
+    saved, sqs = [], FakeSQS()
+    spool = QueueSpool('https://sqs/q', saved.append, client=sqs, default=float)
+    assert spool.put({'worksheet_code': 'abc', 'questions': [{'number': 1, 'score': Decimal('1.5')}]})
+    assert saved == []   # 응답 경로에서는 저장하지 않는다
+
+    event = _event(sqs.sent)
+    assert QueueSpool.is_event(event)
+    assert spool.handle(event) == {'batchItemFailures': []}
+    assert saved == [{'worksheet_code': 'abc', 'questions': [{'number': 1, 'score': 1.5}]}]
+
+
+def test_only_failed_messages_are_returned_for_retry():
+    def write(record):
+        if record['worksheet_code'] == 'bad':
+            raise RuntimeError('throttled')
+
+    spool = QueueSpool('https://sqs/q', write, client=FakeSQS())
+    result = spool.handle(_event(['{"worksheet_code": "ok"}', '{"worksheet_code": "bad"}']))
+    assert result == {'batchItemFailures': [{'itemIdentifier': 'm1'}]}
+
+
+def test_oversized_record_is_not_enqueued():
+    sqs   = FakeSQS()
+    spool = QueueSpool('https://sqs/q', None, client=sqs)
+    assert not spool.put({'worksheet_code': 'big', 'questions': ['x' * MAX_MESSAGE_BYTES]})
+    assert sqs.sent == []
+    assert not QueueSpool.is_event({'httpMethod': 'POST', 'body': '{}'})
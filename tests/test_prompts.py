@@ -0,0 +1,32 @@
+import prompts
+
+def _min_tokens(text):
+    # 토큰 수의 보수적 하한: 영문은 4.5자, 한글 등은 2.5자에 1토큰 이상
+    ascii_chars = sum(c.isascii() for c in text)
+    return ascii_chars / 4.5 + (len(text) - ascii_chars) / 2.5
+
+def test_shared_prefix_reaches_the_prompt_cache_minimum():
+    # OpenAI 프롬프트 캐시는 1024 토큰 이상의 같은 접두부부터 적용된다
+    for prefix in prompts._SHARED_PREFIXES.values():
+        assert _min_tokens(prefix) >= 1024
+
+def test_every_template_starts_with_the_shared_prefix():
+    for template in prompts.TEMPLATES.values():
+        assert template.system.startswith(prompts._SHARED_PREFIXES[template.structured])
+        assert template.version == prompts.PROMPT_VERSION
+
+def test_output_instruction_matches_the_response_mode():
+    plain  = prompts.build_prompt(10, '객관식', '세 자리 수의 덧셈', 2)
+    schema = prompts.build_prompt(10, '객관식', '세 자리 수의 덧셈', 2, structured=True)
+    assert 'Return only a JSON array' in plain.messages[0]['content']
+    assert 'Return only a JSON array' not in schema.messages[0]['content']
+    assert '"questions"' in schema.messages[0]['content']
+    assert 'response_format' not in prompts.chat_body(plain)
+    assert plain.template_id != schema.template_id
+
+def test_variable_parts_stay_in_the_last_message():
+    a = prompts.build_prompt(10, '객관식', '세 자리 수의 덧셈', 2)
+    b = prompts.build_prompt(6, '객관식', '시간의 뺄셈', 1)
+    assert a.template_id == b.template_id
+    assert a.messages[:-1] == b.messages[:-1]
+    assert '세 자리 수의 덧셈' in a.messages[-1]['content']
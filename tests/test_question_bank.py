@@ -0,0 +1,82 @@
+import time
+
+import pytest
+
+from question_bank import QuestionBank, SQLiteBankStore, bank_key
+
+PARTS = ('3', '1단원', '세 자리 수의 덧셈', '객관식', 'calc')
+KEY   = bank_key(*PARTS)
+
+def _questions(n, start=0):
+    return [{'stem': f'{100 + i} + 1 = ?', 'options': ['1', '2', '3', '4'], 'answerIndex': 0}
+            for i in range(start, start + n)]
+
+def _store(tmp_path):
+    return SQLiteBankStore(str(tmp_path / 'bank.db'))
+
+def test_draw_takes_least_served_and_rotates_out(tmp_path):
+    store = _store(tmp_path)
+    store.add(KEY, _questions(4))
+    bank  = QuestionBank(store, refill=lambda parts, n: [], low_water=0, max_serves=2)
+
+    first  = bank.draw([(PARTS, 2)])[0]
+    second = bank.draw([(PARTS, 2)])[0]
+    # 한 번도 안 나간 문항이 먼저 나온다
+    assert {q['stem'] for q in first}.isdisjoint(q['stem'] for q in second)
+    assert store.count(KEY) == 4
+
+    # 두 번째 출제에서 max_serves 에 닿은 문항은 은행에서 빠진다
+    bank.draw([(PARTS, 2)])
+    assert store.count(KEY) == 2
+
+def test_draw_is_all_or_nothing_and_refills(tmp_path):
+    store  = _store(tmp_path)
+    word   = PARTS[:4] + ('word',)
+    store.add(KEY, _questions(5))
+    calls  = []
+
+    def refill(parts, n):
+        calls.append((parts, n))
+        return _questions(n, 100)
+
+    bank = QuestionBank(store, refill, low_water=3, target=6)
+    # 문장제 칸이 비어 있으면 계산 칸도 꺼내지 않는다
+    assert bank.draw([(PARTS, 2), (word, 1)]) is None
+    assert store.count(KEY) == 5
+    assert store.take_many([(KEY, 0)], 30) == [[]]
+
+    # 빈 문장제 칸은 뒤에서 채워진다
+    deadline = time.monotonic() + 5
+    while store.count(bank_key(*word)) < 6 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    bank.top_up(PARTS)
+    assert store.count_many([KEY, bank_key(*word)]) == [6, 6]
+    assert calls == [(word, 6), (PARTS, 1)]
+
+    batches = bank.draw([(PARTS, 2), (word, 1)])
+    assert [len(b) for b in batches] == [2, 1]
+
+def test_prime_preloads_most_drawn_keys_without_refilling(tmp_path):
+    store = _store(tmp_path)
+    quiet = PARTS[:4] + ('word',)
+    store.add(KEY, _questions(30))
+    store.add(bank_key(*quiet), _questions(30, 100))
+    store.take(KEY, 3, 30)   # KEY 만 출제된 적이 있다
+    calls = []
+
+    def refill(parts, n):
+        calls.append((parts, n))
+        return []
+
+    bank = QuestionBank(store, refill, low_water=50, target=60, cache_size=4)
+    assert bank.prime([PARTS, quiet]) == {KEY: 4}
+    assert calls == []   # 웜업은 모델을 부르지 않는다
+
+    # 미리 꺼내 둔 문항은 저장소에 가지 않고 내준다
+    def offline(*args):
+        raise AssertionError('store should not be read')
+    store.count_many = store.take_many = offline
+    assert [len(b) for b in bank.draw([(PARTS, 2)])] == [2]
+    assert [len(b) for b in bank.draw([(PARTS, 2)])] == [2]
+    with pytest.raises(AssertionError):
+        bank.draw([(PARTS, 1)])   # 다 쓰면 다시 저장소로 간다
@@ -0,0 +1,38 @@
+from selection import select_questions
+
+TOPIC = '세 자리 수의 덧셈'
+
+def _calc(a, b, slot=('객관식', 'calc')):
+    return {'stem': f'{a} + {b} = ?', 'options': [str(a + b), '1', '2', '3'], 'answerIndex': 0, '_slot': slot}
+
+def _word(name, n, slot=('객관식', 'word')):
+    return {'stem': f'{name}는 구슬을 {n}개 더 모았습니다. 모두 몇 개인가요?',
+            'options': ['1', '2', '3', '4'], 'answerIndex': 0, '_slot': slot}
+
+def test_unverifiable_word_problems_keep_their_slots():
+    # 검증된 계산 문항(ok)이 검증할 수 없는 문장제보다 점수가 높아도 칸별 문항 수는 그대로다
+    items  = [_calc(100 + i, 200) for i in range(10)] + [_word(n, i) for i, n in enumerate('가나다')]
+    wants  = {('객관식', 'calc'): 8, ('객관식', 'word'): 2}
+    picked = select_questions(items, 10, TOPIC, wants)
+    assert len(picked) == 10
+    assert sum('구슬' in q['stem'] for q in picked) == 2
+    assert not any('_slot' in q for q in items)
+
+def test_scores_are_compared_within_a_slot():
+    long_stem = _word('가', 1)
+    long_stem['stem'] = long_stem['stem'] + ' 구슬은 상자에 담았습니다.' * 6
+    items  = [long_stem, _word('나', 2), _word('다', 3), _calc(111, 222)]
+    picked = select_questions(items, 3, TOPIC, {('객관식', 'word'): 2, ('객관식', 'calc'): 1})
+    assert long_stem not in picked
+    assert [q['stem'][:1] for q in picked] == ['나', '다', '1']
+
+def test_short_slot_is_filled_from_the_rest():
+    items  = [_calc(100 + i, 200) for i in range(5)] + [_word('가', 1)]
+    picked = select_questions(items, 4, TOPIC, {('객관식', 'calc'): 2, ('객관식', 'word'): 2})
+    assert len(picked) == 4
+    assert picked[-1]['stem'].startswith('가')
+
+def test_near_duplicates_lose_to_fresh_questions():
+    items  = [_word('지우', 5), _word('지우', 6), _word('서연', 30)]
+    picked = select_questions(items, 2, TOPIC, {('객관식', 'word'): 2})
+    assert {q['stem'][:2] for q in picked} == {'지우', '서연'}
@@ -0,0 +1,55 @@
+import json
+import threading
+import http.client
+
+import lambda_function
+import stream_server
+
+
+def _serve():
+    server = stream_server.serve(port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _post(server, body):
+    conn = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=5)
+    conn.request('POST', '/', json.dumps(body), {'Content-Type': 'application/json'})
+    return conn.getresponse()
+
+
+def test_questions_arrive_before_generation_finishes(monkeypatch):
+    # 모델이 두 번째 문항을 내놓기 전에 첫 문항이 클라이언트에 도착해야 한다
+    first_read = threading.Event()
+
+    def fake_stream(count, question_type, topic, word_count=None):
+        for i in range(count):
+            if i == 1:
+                assert first_read.wait(5)
+            yield {'stem': f'{topic} 문제 {i}', 'answer': str(i)}
+
+    monkeypatch.setattr(lambda_function, 'stream_openai', fake_stream)
+    monkeypatch.setattr(lambda_function, 'persist', lambda *a, **k: None)
+    server = _serve()
+    try:
+        res = _post(server, {'topic': '도형의 둘레', 'count': 3, 'type': '주관식'})
+        assert res.status == 200
+        assert res.getheader('Content-Type') == 'application/x-ndjson'
+        header = json.loads(res.readline())
+        assert header['degraded'] is False and header['worksheet_code']
+        assert json.loads(res.readline())['number'] == 1
+        first_read.set()
+        rest = [json.loads(line) for line in res.read().splitlines()]
+        assert [q['number'] for q in rest] == [2, 3]
+    finally:
+        server.shutdown()
+
+
+def test_bad_count_is_rejected_before_streaming():
+    server = _serve()
+    try:
+        res = _post(server, {'topic': '도형의 둘레', 'count': 0})
+        assert res.status == 400
+        assert 'count' in json.loads(res.read())['error']
+    finally:
+        server.shutdown()
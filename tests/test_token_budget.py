@@ -0,0 +1,26 @@
+from token_budget import DEFAULT_PER_ITEM, TokenBudget, collecting
+
+TOPIC = '세 자리 수의 덧셈'
+
+def test_usage_is_collected_per_call_type():
+    budget = TokenBudget()
+    with collecting() as usage:
+        budget.record('객관식', TOPIC, {'prompt_tokens': 900, 'completion_tokens': 600}, 4)
+        budget.record('단답형', TOPIC, {'prompt_tokens': 900, 'completion_tokens': 200}, 2)
+        budget.record('객관식', TOPIC, {'prompt_tokens': 900, 'completion_tokens': 300}, 2)
+    assert usage == {
+        '객관식': {'prompt_tokens': 1800, 'completion_tokens': 900, 'items': 6},
+        '단답형': {'prompt_tokens': 900, 'completion_tokens': 200, 'items': 2},
+    }
+
+def test_load_reads_samples_by_call_type_even_for_mixed_worksheets():
+    # 반반 학습지의 usage 도 호출 유형별로 저장되므로 객관식·단답형 예산에 그대로 쓰인다
+    metas = [{'type': '반반', 'usage': {'객관식': {'completion_tokens': 500, 'items': 5},
+                                       '단답형': {'completion_tokens': 300, 'items': 5}}}] * 5
+    budget = TokenBudget()
+    budget.load('객관식', TOPIC, metas)
+    budget.load('단답형', TOPIC, metas)
+    budget.load('반반', TOPIC, metas)
+    assert budget.per_item('객관식', TOPIC) == 100
+    assert budget.per_item('단답형', TOPIC) == 60
+    assert budget.per_item('반반', TOPIC) == DEFAULT_PER_ITEM
@@ -0,0 +1,47 @@
+from verify import check, solve
+
+
+def test_division_asking_for_the_quotient_keeps_the_quotient():
+    q = {'stem': '17 ÷ 5의 몫을 구하세요.', 'answer': '3'}
+    assert check(q) == 'ok'
+    assert q['answer'] == '3'
+
+
+def test_division_with_remainder_uses_divmod():
+    assert solve('17 ÷ 5의 몫과 나머지를 구하세요.') == ('divmod', (3, 2))
+    assert check({'stem': '17 ÷ 5의 몫과 나머지를 구하세요.', 'answer': '몫 3, 나머지 2'}) == 'ok'
+    assert check({'stem': '17 ÷ 5 = ?', 'answer': '3 … 2'}) == 'ok'
+
+    q = {'stem': '17 ÷ 5 = ?', 'answer': '3 … 1'}
+    assert check(q) == 'repaired'
+    assert q['answer'] == '몫 3, 나머지 2'
+
+
+def test_division_without_remainder():
+    assert check({'stem': '56 ÷ 7 = ?', 'answer': '8'}) == 'ok'
+    q = {'stem': '56 ÷ 7 = ?', 'options': ['7', '9', '8', '6'], 'answerIndex': 0}
+    assert check(q) == 'repaired'
+    assert q['answerIndex'] == 2
+
+
+def test_time_addition_carries_minutes():
+    assert check({'stem': '2시간 40분 + 1시간 35분 = ?', 'answer': '4시간 15분'}) == 'ok'
+    q = {'stem': '2시간 40분 + 1시간 35분 = ?', 'answer': '3시간 75분'}
+    assert check(q) == 'repaired'
+    assert q['answer'] == '4시간 15분'
+
+
+def test_time_subtraction_borrows_an_hour():
+    assert check({'stem': '5시간 10분 - 2시간 30분 = ?', 'answer': '2시간 40분'}) == 'ok'
+
+
+def test_comparisons():
+    assert solve('○ 안에 >, =, < 중 알맞은 것을 써넣으세요. 3/4 ○ 5/8') == ('sign', '>')
+    q = {'stem': '○ 안에 >, =, < 중 알맞은 것을 써넣으세요. 0.7 ○ 0.9', 'answer': '>'}
+    assert check(q) == 'repaired'
+    assert q['answer'] == '<'
+
+    q = {'stem': '2/7, 5/7, 3/7, 6/7 중에서 가장 큰 수는 무엇인가요?',
+         'options': ['2/7', '5/7', '3/7', '6/7'], 'answerIndex': 1}
+    assert check(q) == 'repaired'
+    assert q['answerIndex'] == 3
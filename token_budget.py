@@ -0,0 +1,86 @@
+import math
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+
+# 출력 토큰 예산 (max_tokens).
+# 지난 응답의 usage 로 (유형, 주제) 별 문항당 출력 토큰을 모아 두고, 요청 문항 수에
+# 그 percentile 값을 곱해 max_tokens 를 정한다. 표본이 모자라면 기본값을 쓴다.
+# 학습지마다 쓴 토큰은 collecting() 으로 호출 유형(객관식/단답형/반반)별로 모아 메타데이터(usage)에
+# 함께 저장하고, 콜드 컨테이너는 저장된 학습지들의 usage 로 표본을 다시 채운다 (load()).
+# 반반 학습지도 샤드는 객관식·단답형으로 나눠 호출하므로 학습지 유형이 아니라 호출 유형으로 센다.
+
+DEFAULT_PER_ITEM = 200   # 표본이 없을 때 문항당 출력 토큰
+OVERHEAD         = 16    # 배열 괄호·래퍼 객체 등 문항 밖 토큰
+
+_usage      = contextvars.ContextVar('worksheet_usage', default=None)
+_usage_lock = threading.Lock()
+
+@contextmanager
+def collecting():
+    # 이 블록 안(같은 컨텍스트를 물려받은 스레드 포함)에서 쓴 토큰을 호출 유형별로 모은다
+    totals = {}   # 유형 -> {'prompt_tokens', 'completion_tokens', 'items'}
+    token  = _usage.set(totals)
+    try:
+        yield totals
+    finally:
+        _usage.reset(token)
+
+def _add_to_worksheet(question_type, usage, items):
+    totals = _usage.get()
+    if totals is None:
+        return
+    with _usage_lock:
+        total = totals.setdefault(question_type, {'prompt_tokens': 0, 'completion_tokens': 0, 'items': 0})
+        total['prompt_tokens']     += usage.get('prompt_tokens', 0)
+        total['completion_tokens'] += usage.get('completion_tokens', 0)
+        total['items']             += items
+
+
+class TokenBudget:
+    def __init__(self, percentile=0.9, headroom=1.15, min_samples=5, window=100,
+                 default_per_item=DEFAULT_PER_ITEM):
+        self.percentile       = percentile
+        self.headroom         = headroom
+        self.min_samples      = min_samples
+        self.window           = window
+        self.default_per_item = default_per_item
+        self._samples         = {}      # (유형, 주제) -> deque[문항당 출력 토큰]
+        self._loaded          = set()
+        self._lock            = threading.Lock()
+
+    def _add(self, key, per_item):
+        with self._lock:
+            self._samples.setdefault(key, deque(maxlen=self.window)).append(per_item)
+
+    def record(self, question_type, topic, usage, items):
+        # 응답 하나의 usage -> 문항당 출력 토큰 표본 (잘린 응답은 버린 토큰까지 비용으로 센다)
+        if not usage or not items:
+            return
+        self._add((question_type, topic), usage.get('completion_tokens', 0) / items)
+        _add_to_worksheet(question_type, usage, items)
+
+    def load(self, question_type, topic, metas):
+        # 저장된 학습지 메타데이터의 usage[호출 유형] 으로 표본을 채운다 (컨테이너마다 한 번)
+        for meta in metas:
+            usage = (meta.get('usage') or {}).get(question_type) or {}
+            if usage.get('items'):
+                self._add((question_type, topic), int(usage['completion_tokens']) / int(usage['items']))
+
+    def needs_load(self, question_type, topic):
+        with self._lock:
+            if (question_type, topic) in self._loaded:
+                return False
+            self._loaded.add((question_type, topic))
+            return True
+
+    def per_item(self, question_type, topic):
+        with self._lock:
+            samples = sorted(self._samples.get((question_type, topic), ()))
+        if len(samples) < self.min_samples:
+            return self.default_per_item
+        return samples[min(len(samples) - 1, int(self.percentile * len(samples)))]
+
+    def max_tokens(self, question_type, topic, count):
+        return int(math.ceil(OVERHEAD + count * self.per_item(question_type, topic) * self.headroom))
@@ -0,0 +1,181 @@
+import re
+from decimal import Decimal, InvalidOperation
+from fractions import Fraction
+
+# 저장 전에 계산 문항의 정답을 직접 다시 구해 확인한다.
+# 사칙연산·시간 계산·분수/소수 비교 문제를 문장에서 읽어 정확한 수(Fraction/Decimal)로
+# 계산하고, 답 키가 틀렸으면 바로잡는다. 문장제처럼 읽을 수 없는 문항은 건드리지 않는다.
+
+_NUM    = r'\d+(?:\.\d+)?(?:/\d+)?'
+_ARITH  = re.compile(rf'({_NUM})\s*([+＋\-−×xX*÷/])\s*({_NUM})')
+_TIME   = re.compile(r'(?:(\d+)\s*시간)?\s*(?:(\d+)\s*분)?')
+_T_TERM = r'(?:\d+\s*시간(?:\s*\d+\s*분)?|\d+\s*분)'
+_TIME_E = re.compile(rf'({_T_TERM})\s*([+\-−])\s*({_T_TERM})')
+_CMP    = re.compile(rf'({_NUM})\s*○\s*({_NUM})')
+_DIVMOD = re.compile(r'(\d+)\D+?(\d+)')
+_REMAIN = re.compile(r'나머지|…|\.{3}')
+
+def _number(text):
+    text = text.replace(',', '').strip()
+    try:
+        if '/' in text:
+            return Fraction(text)
+        return Fraction(Decimal(text))
+    except (ValueError, ZeroDivisionError, InvalidOperation):
+        return None
+
+def _minutes(text, canonical=False):
+    m = _TIME.fullmatch(text.strip())
+    if not m or not any(m.groups()):
+        return None
+    if canonical and m.group(1) and int(m.group(2) or 0) >= 60:
+        return None   # '8시간 75분' 처럼 받아올림을 안 한 답은 정답으로 치지 않는다
+    return int(m.group(1) or 0) * 60 + int(m.group(2) or 0)
+
+def _has_remainder(texts):
+    return any(t is not None and _REMAIN.search(str(t)) for t in texts)
+
+def _sign(x, y):
+    return '>' if x > y else '<' if x < y else '='
+
+def solve(stem, options=None, answer=None):
+    # (종류, 값) — 종류: 'num' / 'divmod' / 'time' / 'sign', 읽을 수 없으면 None
+    # answer/options 는 답을 어떤 꼴로 적었는지(나머지 꼴인지) 볼 때만 쓴다
+    stem = str(stem)
+
+    m = _CMP.search(stem)
+    if m:
+        x, y = _number(m.group(1)), _number(m.group(2))
+        if x is not None and y is not None:
+            return ('sign', _sign(x, y))
+
+    if '가장 큰 수' in stem or '가장 작은 수' in stem:
+        values = [_number(o) for o in options or []]
+        if values and None not in values:
+            pick = max(values) if '가장 큰 수' in stem else min(values)
+            return ('num', pick)
+        return None
+
+    m = _TIME_E.search(stem)
+    if m:
+        if re.search(r'\d', stem[:m.start()] + stem[m.end():]):
+            return None
+        a, b = _minutes(m.group(1)), _minutes(m.group(3))
+        return ('time', a + b if m.group(2) == '+' else a - b)
+
+    m = _ARITH.search(stem)
+    if not m:
+        return None
+    # 식 밖에 다른 수가 있으면 문장제로 보고 검증하지 않는다
+    if re.search(r'\d', stem[:m.start()] + stem[m.end():]):
+        return None
+    a, op, b = _number(m.group(1)), m.group(2), _number(m.group(3))
+    if a is None or b is None:
+        return None
+    if op in '+＋':
+        return ('num', a + b)
+    if op in '-−':
+        return ('num', a - b)
+    if op in '×xX*':
+        return ('num', a * b)
+    if b == 0:
+        return None
+    if a.denominator != 1 or b.denominator != 1:
+        return None if '나머지' in stem else ('num', a / b)
+    # 자연수 ÷ 자연수: 답을 나머지 꼴로 적었으면 몫과 나머지, '몫'을 물으면 몫만 비교한다
+    if '나머지' in stem or _has_remainder([answer] + list(options or [])):
+        return ('divmod', divmod(int(a), int(b)))
+    if '몫' in stem:
+        return ('num', Fraction(int(a) // int(b)))
+    return ('num', a / b)
+
+def parse_answer(text, kind):
+    text = str(text).strip()
+    if kind == 'sign':
+        for s in '><=':
+            if s in text:
+                return s
+        return None
+    if kind == 'time':
+        return _minutes(text, canonical=True)
+    if kind == 'divmod':
+        m = _DIVMOD.search(text.replace('몫', ' '))
+        return (int(m.group(1)), int(m.group(2))) if m else None
+    m = re.search(_NUM, text.replace(',', ''))
+    return _number(m.group()) if m else None
+
+def format_truth(truth):
+    kind, value = truth
+    if kind == 'time':
+        h, m = divmod(value, 60)
+        return f"{h}시간 {m}분" if h and m else f"{h}시간" if h else f"{m}분"
+    if kind == 'divmod':
+        return f"몫 {value[0]}, 나머지 {value[1]}"
+    if kind == 'num':
+        if value.denominator == 1:
+            return str(value.numerator)
+        return str(value)
+    return value
+
+def check(q):
+    # 'ok' / 'repaired' / 'failed' / 'unverified'
+    options = q.get('options') or []
+    truth   = solve(q.get('stem', ''), options, q.get('answer'))
+    if truth is None:
+        return 'unverified'
+    kind, value = truth
+
+    if options:
+        matches = [i for i, o in enumerate(options) if parse_answer(o, kind) == value]
+        if len(matches) != 1:
+            return 'failed'
+        if q.get('answerIndex') == matches[0]:
+            return 'ok'
+        q['answerIndex'] = matches[0]
+        return 'repaired'
+
+    if parse_answer(q.get('answer', ''), kind) == value:
+        return 'ok'
+    q['answer'] = format_truth(truth)
+    return 'repaired'
+
+def _force_answer(q):
+    # 다시 만들어도 틀리면 정답 자리의 선지를 계산한 값으로 바꾼다
+    truth   = solve(q.get('stem', ''), q.get('options'))
+    options = q['options']
+    idx     = q.get('answerIndex')
+    if not isinstance(idx, int) or not 0 <= idx < len(options):
+        idx = len(options) - 1
+    correct = format_truth(truth)
+    for i, o in enumerate(options):
+        if i != idx and parse_answer(o, truth[0]) == truth[1]:
+            options[i] = options[idx]
+    options[idx]     = correct
+    q['answerIndex'] = idx
+
+def repair(q):
+    # 스트리밍처럼 다시 만들 틈이 없을 때: 고칠 수 있으면 고치고, 아니면 답 선지를 덮어쓴다
+    if check(q) == 'failed':
+        _force_answer(q)
+    return q
+
+def verify_questions(questions, regenerate=None):
+    # 틀린 답 키는 고치고, 고칠 수 없는 문항만 regenerate(n) 으로 다시 만든다
+    failed = [i for i, q in enumerate(questions) if check(q) == 'failed']
+    if failed:
+        print(f"Answer verification failed for questions {[questions[i].get('number') for i in failed]}")
+
+    if failed and regenerate:
+        try:
+            fresh = [q for q in regenerate(len(failed)) if check(q) != 'failed']
+        except Exception as e:
+            print("Regeneration of failed questions failed:", str(e))
+            fresh = []
+        for i, q in zip(list(failed), fresh):
+            q['number']  = questions[i].get('number')
+            questions[i] = q
+            failed.remove(i)
+
+    for i in failed:
+        _force_answer(questions[i])
+    return questions
@@ -0,0 +1,51 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+# 학습지 조회(GET) 응답 캐시. 학습지는 만들어진 뒤 바뀌지 않으므로
+# 직렬화한 응답 본문과 그 해시로 만든 강한 ETag 를 컨테이너 메모리에 둔다.
+# 전체 크기(바이트)가 max_bytes 를 넘으면 가장 오래 안 쓴 것부터 버린다.
+
+def make_etag(body):
+    return '"' + hashlib.sha256(body.encode()).hexdigest()[:32] + '"'
+
+def etag_matches(if_none_match, etag):
+    # If-None-Match 는 약한 비교 (CloudFront 등이 W/ 를 붙여 보내도 맞춘다)
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(',')]
+    return '*' in tags or etag in [t[2:] if t.startswith('W/') else t for t in tags]
+
+
+class LRUCache:
+    def __init__(self, max_bytes=16 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size      = 0
+        self._items    = OrderedDict()   # key -> (etag, body, 바이트 수)
+        self._lock     = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is not None:
+                self._items.move_to_end(key)
+            return entry and entry[:2]
+
+    def put(self, key, body):
+        etag = make_etag(body)
+        cost = len(body.encode())
+        if cost > self.max_bytes:
+            return etag
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.size -= old[2]
+            self._items[key] = (etag, body, cost)
+            self.size += cost
+            while self.size > self.max_bytes:
+                _, (_, _, evicted) = self._items.popitem(last=False)
+                self.size -= evicted
+        return etag
+
+    def __len__(self):
+        return len(self._items)
@@ -0,0 +1,80 @@
+import json
+import zlib
+import time
+from decimal import Decimal
+
+# DynamoDB 학습지 저장 형식.
+#   format_version 1 (rows)  : 문항 하나당 항목 하나 (question_number = 1..N)
+#   format_version 2 (single): 학습지 하나당 항목 하나 (question_number = 0),
+#                              메타데이터 + zlib 으로 압축한 문항 JSON (questions, Binary)
+# 읽는 쪽은 load_questions() 로 두 형식을 모두 처리한다.
+
+FORMAT_ROWS   = 1
+FORMAT_SINGLE = 2
+
+def encode_questions(questions):
+    raw = json.dumps(questions, ensure_ascii=False, separators=(',', ':')).encode()
+    return zlib.compress(raw, 6)
+
+def decode_questions(blob):
+    return json.loads(zlib.decompress(getattr(blob, 'value', blob)))
+
+def row_items(code, questions):
+    items = []
+    for q in questions:
+        if 'answerIndex' in q:
+            answer_value = q['answerIndex'] + 1
+        else:
+            answer_value = q.get('answer', '')
+
+        items.append({
+            'worksheet_code' : code,
+            'question_number': q['number'],
+            'question'       : q['stem'],
+            'options'        : q.get('options', []),
+            'answer'         : answer_value,
+            'advice'         : q.get('advice', '')
+        })
+    return items
+
+def single_item(code, questions, meta=None):
+    item = {
+        'worksheet_code' : code,
+        'question_number': 0,
+        'format_version' : FORMAT_SINGLE,
+        'created_at'     : int(time.time()),
+        'questions'      : encode_questions(questions),
+    }
+    for k, v in (meta or {}).items():
+        if v is not None:
+            item[k] = v
+    return item
+
+def _question_from_row(item):
+    q = {
+        'number': int(item['question_number']),
+        'stem'  : item.get('question', ''),
+        'advice': item.get('advice', ''),
+    }
+    options = list(item.get('options') or [])
+    if options:
+        q['options']     = options
+        q['answerIndex'] = int(item.get('answer', 1)) - 1
+    else:
+        q['answer'] = item.get('answer', '')
+    return q
+
+def load_questions(items):
+    # 조회한 항목들 -> (메타데이터, 문항 목록); 항목이 없으면 None
+    for item in items:
+        if int(item.get('format_version', FORMAT_ROWS)) == FORMAT_SINGLE:
+            meta = {k: int(v) if isinstance(v, Decimal) else v
+                    for k, v in item.items() if k not in ('questions', 'question_number')}
+            return meta, decode_questions(item['questions'])
+
+    rows = [it for it in items if int(it.get('question_number', 0)) > 0]
+    if not rows:
+        return None
+    rows.sort(key=lambda it: int(it['question_number']))
+    meta = {'worksheet_code': rows[0]['worksheet_code'], 'format_version': FORMAT_ROWS}
+    return meta, [_question_from_row(it) for it in rows]
@@ -0,0 +1,212 @@
+import json
+import time
+import threading
+
+from bulk_writer import BulkWriter, dynamodb_client, from_attributes, to_attributes
+from worksheet_layout import (
+    FORMAT_SINGLE, decode_questions, encode_questions, load_questions, row_items, single_item,
+)
+
+# 학습지 저장소. 모든 저장소는 네 연산을 구현한다.
+#   put_worksheet(code, questions, meta)  : 학습지 하나 저장
+#   get_worksheet(code)                   : (메타데이터, 문항 목록) 또는 None
+#   batch_put([(code, questions, meta)])  : 여러 학습지를 한 번에 저장
+#   query_by_topic(topic, limit)          : 주제별 최근 학습지 [(메타데이터, 문항 목록), ...]
+#                                           (supports_topic_query 가 False 면 쓰지 않는다)
+#
+#   memory                       : 컨테이너 메모리 (테스트·벤치마크용)
+#   sqlite:<path>                : 로컬 SQLite 파일 (WAL)
+#   dynamodb:<table>             : 운영용 DynamoDB 테이블 (pk: worksheet_code, sk: question_number)
+#   sqlite:<path>+dynamodb:<table> : SQLite 를 앞에 둔 읽기 캐시 계층 (재출력 트래픽용)
+
+def _meta(code, meta, created_at, format_version):
+    out = {'worksheet_code': code, 'format_version': format_version, 'created_at': created_at}
+    out.update({k: v for k, v in (meta or {}).items() if v is not None})
+    return out
+
+
+class MemoryWorksheetStore:
+    supports_topic_query = True
+
+    def __init__(self):
+        self._worksheets = {}   # code -> (meta, questions JSON)
+        self._lock       = threading.Lock()
+
+    def put_worksheet(self, code, questions, meta=None):
+        record = (_meta(code, meta, int(time.time()), FORMAT_SINGLE), json.dumps(questions, ensure_ascii=False))
+        with self._lock:
+            self._worksheets[code] = record
+
+    def get_worksheet(self, code):
+        with self._lock:
+            record = self._worksheets.get(code)
+        if record is None:
+            return None
+        return dict(record[0]), json.loads(record[1])
+
+    def batch_put(self, worksheets):
+        for code, questions, meta in worksheets:
+            self.put_worksheet(code, questions, meta)
+
+    def query_by_topic(self, topic, limit=20):
+        with self._lock:
+            records = [r for r in self._worksheets.values() if r[0].get('topic') == topic]
+        records.sort(key=lambda r: r[0]['created_at'], reverse=True)
+        return [(dict(m), json.loads(q)) for m, q in records[:limit]]
+
+
+class SQLiteWorksheetStore:
+    supports_topic_query = True
+
+    def __init__(self, path):
+        import sqlite3
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS worksheets ("
+            " worksheet_code TEXT PRIMARY KEY, topic TEXT, created_at INTEGER NOT NULL,"
+            " meta TEXT NOT NULL, questions BLOB NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS worksheets_topic ON worksheets (topic, created_at)")
+
+    def _row(self, code, questions, meta):
+        meta = _meta(code, meta, int((meta or {}).get('created_at') or time.time()), FORMAT_SINGLE)
+        return (code, meta.get('topic'), meta['created_at'],
+                json.dumps(meta, ensure_ascii=False), encode_questions(questions))
+
+    def put_worksheet(self, code, questions, meta=None):
+        self.batch_put([(code, questions, meta)])
+
+    def get_worksheet(self, code):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT meta, questions FROM worksheets WHERE worksheet_code = ?", (code,)
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), decode_questions(row[1])
+
+    def batch_put(self, worksheets):
+        rows = [self._row(*w) for w in worksheets]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO worksheets (worksheet_code, topic, created_at, meta, questions)"
+                " VALUES (?, ?, ?, ?, ?)", rows)
+            self._conn.execute("COMMIT")
+
+    def query_by_topic(self, topic, limit=20):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT meta, questions FROM worksheets WHERE topic = ?"
+                " ORDER BY created_at DESC LIMIT ?", (topic, limit)
+            ).fetchall()
+        return [(json.loads(m), decode_questions(q)) for m, q in rows]
+
+
+class DynamoWorksheetStore:
+    def __init__(self, table_name, layout='rows', topic_index='topic-created_at-index'):
+        # layout: rows (문항별 항목) | single (학습지 한 항목); 읽기는 두 형식 모두 처리한다.
+        # query_by_topic 은 topic 이 있는 single 형식 항목만 찾는다 (topic 해시 / created_at 정렬 GSI).
+        self.table_name  = table_name
+        self.layout      = layout
+        self.topic_index = topic_index
+        self._writer     = BulkWriter(table_name, key_names=('worksheet_code', 'question_number'))
+
+    @property
+    def supports_topic_query(self):
+        # rows 형식 테이블에는 topic·메타데이터가 없고 GSI 도 없다
+        return self.layout == 'single'
+
+    def _items(self, code, questions, meta):
+        if self.layout == 'single':
+            return [single_item(code, questions, meta)]
+        return row_items(code, questions)
+
+    def put_worksheet(self, code, questions, meta=None):
+        if self.layout == 'single':
+            dynamodb_client().put_item(TableName=self.table_name,
+                                       Item=to_attributes(single_item(code, questions, meta)))
+            return
+        self.batch_put([(code, questions, meta)])
+
+    def get_worksheet(self, code):
+        items, kwargs = [], {
+            'TableName'                : self.table_name,
+            'KeyConditionExpression'   : 'worksheet_code = :c',
+            'ExpressionAttributeValues': {':c': {'S': code}},
+        }
+        while True:
+            res    = dynamodb_client().query(**kwargs)
+            items += [from_attributes(it) for it in res.get('Items', [])]
+            if 'LastEvaluatedKey' not in res:
+                return load_questions(items)
+            kwargs['ExclusiveStartKey'] = res['LastEvaluatedKey']
+
+    def batch_put(self, worksheets):
+        stats = self._writer.write([it for w in worksheets for it in self._items(*w)])
+        if stats['failed']:
+            raise Exception(f"Worksheet write left {stats['failed']} unprocessed items")
+        return stats
+
+    def query_by_topic(self, topic, limit=20):
+        res = dynamodb_client().query(
+            TableName=self.table_name,
+            IndexName=self.topic_index,
+            KeyConditionExpression='topic = :t',
+            ExpressionAttributeValues={':t': {'S': topic}},
+            ScanIndexForward=False,
+            Limit=limit,
+        )
+        return [load_questions([from_attributes(it)]) for it in res.get('Items', [])]
+
+
+class CachedWorksheetStore:
+    # 앞 저장소(cache)에서 먼저 읽고, 없으면 뒤 저장소(origin)에서 읽어 채운다.
+    # 쓰기는 origin 에 먼저 한 뒤 cache 에 한다. 학습지는 바뀌지 않으므로 무효화가 필요 없다.
+    def __init__(self, cache, origin):
+        self.cache  = cache
+        self.origin = origin
+
+    @property
+    def supports_topic_query(self):
+        return self.origin.supports_topic_query
+
+    def put_worksheet(self, code, questions, meta=None):
+        self.origin.put_worksheet(code, questions, meta)
+        self.cache.put_worksheet(code, questions, meta)
+
+    def get_worksheet(self, code):
+        hit = self.cache.get_worksheet(code)
+        if hit is not None:
+            return hit
+        loaded = self.origin.get_worksheet(code)
+        if loaded is not None:
+            meta, questions = loaded
+            self.cache.put_worksheet(code, questions, meta)
+        return loaded
+
+    def batch_put(self, worksheets):
+        stats = self.origin.batch_put(worksheets)
+        self.cache.batch_put(worksheets)
+        return stats
+
+    def query_by_topic(self, topic, limit=20):
+        return self.origin.query_by_topic(topic, limit)
+
+
+def open_worksheet_store(spec, layout='rows'):
+    if '+' in spec:
+        cache, origin = spec.split('+', 1)
+        return CachedWorksheetStore(open_worksheet_store(cache, layout), open_worksheet_store(origin, layout))
+    kind, _, arg = spec.partition(':')
+    if kind == 'memory':
+        return MemoryWorksheetStore()
+    if kind == 'sqlite':
+        return SQLiteWorksheetStore(arg or '/tmp/worksheets.db')
+    if kind == 'dynamodb':
+        return DynamoWorksheetStore(arg, layout)
+    raise ValueError(f"Unknown worksheet store: {spec}")